@@ -13,6 +13,7 @@ from logger import *
 from sudoku import *
 from playbook import *
 from strategy import *
+from strategy.exact_cover import *
 from hook import *
 
 class Game(object):
@@ -30,6 +31,11 @@ class Game(object):
             print "Invalid sudoku instance!"
             return
 
+        message = ExactCover.check(sudoku)
+        if message:
+            print message
+            return
+
         print "Sudoku instance:", ident
         if Game.verbose:
             print sudoku.format(verbose = True)
@@ -81,12 +81,17 @@ class Options(object):
         "ALS" : 30,
         "APE" : 31,
         # Level >= 40
+        "FRANKEN-FISH" : 40,
         "FINNED X-WING" : 40,
         "FINNED SWORD-FISH" : 41,
+        "IMPLICATION-CHAIN" : 45,
+        "PROBE" : 46,
         # Level >= 50
         "AIC" : 50,
         "DIGIT FORCING-CHAIN" : 51,
         "NISHIO FORCING-CHAIN" : 52,
+        "CELL FORCING-CHAIN" : 53,
+        "UNIT FORCING-CHAIN" : 54,
         # Level >= 60
         "GROUPED-AIC" : 60,
         "JELLY-FISH" : 61,
@@ -95,7 +100,9 @@ class Options(object):
         # Level > 90
         "TRIAL-1" : 97,
         "TRIAL-2" : 98,
-        "TRIAL-3" : 99
+        "TRIAL-3" : 99,
+        "TRIAL-DFS" : 100,
+        "TRIAL-CDCL" : 100
         }
 
     def __init__(self):
@@ -143,6 +150,7 @@ class Plan(object):
         self.hooks = list()
         self.parms = dict()
         self.attrs = dict()
+        self.caches = dict()
 
     def get_sudoku(self):
         return self.sudoku
@@ -189,6 +197,14 @@ class Plan(object):
     def get_parm(self, hook):
         return self.parms.get(hook, None)
 
+    """
+    Return the named cache shared between the strategies in the plan.
+    The cache is created empty on first use. It is up to the strategies
+    to keep what's in it valid as the Sudoku instance is updated.
+    """
+    def get_cache(self, name):
+        return self.caches.setdefault(name, dict())
+
     def iterate(self):
         for level in sorted(self.strategies.keys()):
             status = False
@@ -207,13 +223,25 @@ class Plan(object):
         self.sudoku.validate()
         return True
 
+    """
+    Terminate the pools of worker processes kept in the "POOL" cache by
+    the strategies, if any.
+    """
+    def release(self):
+        for pool in self.caches.pop("POOL", dict()).values():
+            pool.terminate()
+            pool.join()
+
     def attack(self):
-        while not self.done():
-            if not self.iterate():
-                Logger.debug(2, "impasse")
-                return False
-        Logger.debug(2, "success")
-        return True
+        try:
+            while not self.done():
+                if not self.iterate():
+                    Logger.debug(2, "impasse")
+                    return False
+            Logger.debug(2, "success")
+            return True
+        finally:
+            self.release()
 
     def format(self):
         steps = [{"strategy": s, "level": l} for l in sorted(self.strategies.keys())
@@ -13,6 +13,8 @@ import os
 import tempfile
 from datetime import datetime
 from BeautifulSoup import BeautifulSoup as bs
+from sudoku import *
+from strategy.exact_cover import *
 
 def parse_output(file, html = True):
     # Extract the json data.
@@ -86,12 +88,14 @@ def process_snap(snap, i, html = True):
             intersection(r)
         elif s == "ST.X-WING" or s == "ST.SWORD-FISH" or \
                 s == "ST.JELLY-FISH" or s == "ST.FINNED X-WING" or \
-                s == "ST.FINNED SWORD-FISH":
+                s == "ST.FINNED SWORD-FISH" or s == "ST.FRANKEN-FISH":
             fish(s, r)
         elif s == "ST.X-CYCLE" or s == "ST.GROUPED-X-CYCLE" or \
                 s == "ST.AIC" or s == "ST.GROUPED-AIC":
             aic(s, r)
-        elif s == "ST.DIGIT FORCING-CHAIN" or s == "ST.NISHIO FORCING-CHAIN":
+        elif s == "ST.DIGIT FORCING-CHAIN" or s == "ST.NISHIO FORCING-CHAIN" or \
+                s == "ST.CELL FORCING-CHAIN" or s == "ST.UNIT FORCING-CHAIN" or \
+                s == "ST.IMPLICATION-CHAIN":
             forcing_chain(s, r)
         elif s == "ST.APE":
             ape(r, action)
@@ -103,6 +107,8 @@ def process_snap(snap, i, html = True):
             als(r)
         elif s == "ST.DEATH-BLOSSOM":
             death_blossom(r)
+        elif s == "ST.PROBE":
+            probe(r)
 
         # Action.
         show_action(action)
@@ -307,23 +313,27 @@ def als(reason):
 def death_blossom(reason):
     add_comment("ST.DEATH-BLOSSOM")
     stem = reason["stem"]
-    petal1 = reason["petal1"]
-    petal2 = reason["petal2"]
+    petals = reason["petals"]
     rcs = reason["rcs"]
     ucs = reason["ucs"]
 
     for node in stem:
         highlight_hints(node, rcs, "reason")
 
-    for node in petal1:
-        highlight_hints(node, rcs, "reason_2")
-
-    for node in petal2:
-        highlight_hints(node, rcs, "reason_2")
+    for petal in petals:
+        for node in petal:
+            highlight_hints(node, rcs, "reason_2")
 
 def highlight_node(node, type):
     print "board.highlightNodeBorder({0}, Decorator.{1})".format(node_ident(node), type)
 
+def probe(reason):
+    add_comment("ST.PROBE")
+    highlight_hints(reason["probe"], [reason["hint"]], "reason")
+    for node, hint in reason["via"]:
+        highlight_hints(node, [hint], "reason_2")
+        connect_nodes(reason["probe"], node)
+
 def highlight_hints(node, hints, type, hintBorder = False, nodeBorder = True):
     src = []
     id = node_ident(node)
@@ -462,6 +472,12 @@ def generate_plain(sudoku, out):
     parse_output(out, False)
 
 def run(sudoku, html = True):
+    # Same as the game, reject instances without a unique solution.
+    message = ExactCover.check(Sudoku.load(sudoku, "00"))
+    if message:
+        print message
+        sys.exit(-1)
+
     # Create tenporary files.
     param = tempfile.NamedTemporaryFile()
     output = tempfile.NamedTemporaryFile()
@@ -14,6 +14,8 @@ __all__ = [
     "xyz_wing",
     "y_wing",
     "forcing_chain",
+    "implication",
     "als",
-    "death_blossom"
+    "death_blossom",
+    "probe"
     ]
@@ -121,9 +121,10 @@ class Loop(Chain):
     it is contiguous. In the former case, if the first link has color
     True, it's weak; else it's strong.
     """
-    def __init__(self, name, biloc_only = True, group_limit = 0, length_limit = 16):
+    def __init__(self, name, biloc_only = True, group_limit = 0, length_limit = 16, deepen = True):
         Chain.__init__(self, name, biloc_only, group_limit)
         self.length_limit = length_limit
+        self.deepen = deepen
 
     """
     Check if the AIC is contiguous, i.e., -A+B-C+D.
@@ -171,51 +172,49 @@ class Loop(Chain):
         return head == tail and hc and not tc
 
     """
-    Check if two contiguous chains are identical except for shifting.
-    For example, -A+B-C+D and -C+D-A+B
+    Return the sort key of a location in the AIC, which identifies the
+    link by the indices of the nodes in the group and the hint, along
+    with the color.
     """
-    def loop_duplicate_oneway(self, cycle, other):
-        if not cycle[0] in other:
-            return False
-        index = other.index(cycle[0])
-        return cycle == other[index:] + other[0:index]
+    def loop_key(self, loc):
+        (group, hint), color = loc
+        return (tuple(sorted([x.get_index() for x in group])), hint, color)
 
     """
-    Check if two contiguous chains are identical. In addition to
-    shifting the original, also check that the flipped version is
-    shift equivalent.
+    Return the canonical form of the AIC, such that two AIC's are
+    identical if and only if their canonical forms are equal. This lets
+    us dedup the AIC's with a set instead of comparing each new one
+    against all found before.
+
+    Two contiguous chains are identical if one can reach the other via
+    shifting, such as -A+B-C+D and -C+D-A+B, or the reverse of one with
+    the color in each link flipped can, such as -A+B-C+D and -D+C-B+A.
+    The canonical form is the minimum of all such shifts.
+
+    Two discontiguous chains, either strong or weak, are identical if
+    the heads are identical and the mid-section of one is exactly the
+    reverse flip of the other. The canonical form is the head and the
+    minimum of the mid-section and its reverse flip.
+
+    AIC's that are neither are never considered identical. None is
+    returned for those.
     """
-    def loop_duplicate_contig(self, cycle, other):
-        return self.loop_duplicate_oneway(cycle, other) or \
-            self.loop_duplicate_oneway(self.chain_reverse_flip(cycle), other)
+    def loop_canonical(self, cycle):
+        if self.loop_contig(cycle):
+            keys = [[self.loop_key(x) for x in y]
+                    for y in [cycle, self.chain_reverse_flip(cycle)]]
+            return ("contig", min([tuple(k[n:] + k[:n]) for k in keys for n in range(len(k))]))
 
-    """
-    Check if two strong discontiguous chains are identical. The heads
-    must be identical and the mid-section must be exactly flip.
-    """
-    def loop_duplicate_strong(self, cycle, other):
-        return cycle[0] == other[0] and self.chain_reverse_flip(cycle[1:-1]) == other[1:-1]
+        if self.loop_strong(cycle):
+            kind = "strong"
+        elif self.loop_weak(cycle):
+            kind = "weak"
+        else:
+            return None
 
-    """
-    Check if two weak discontiguous chains are identical. The heads
-    must be identical and the mid-section must be exactly flip.
-    """
-    def loop_duplicate_weak(self, cycle, other):
-        return cycle[0] == other[0] and self.chain_reverse_flip(cycle[1:-1]) == other[1:-1]
-
-    """
-    Test if two AIC cycles are identical.
-    """
-    def loop_duplicate(self, cycle, other):
-        if len(cycle) != len(other):
-            return False
-        if self.loop_contig(cycle) and self.loop_contig(cycle):
-            return self.loop_duplicate_contig(cycle, other)
-        if self.loop_strong(cycle) and self.loop_strong(other):
-            return self.loop_duplicate_strong(cycle, other)
-        if self.loop_weak(cycle) and self.loop_weak(other):
-            return self.loop_duplicate_weak(cycle, other)
-        return False
+        mid = [tuple([self.loop_key(x) for x in y])
+               for y in [cycle[1:-1], self.chain_reverse_flip(cycle[1:-1])]]
+        return (kind, self.loop_key(cycle[0]), min(mid))
 
     """
     Process the AIC for hint elimination.
@@ -306,24 +305,43 @@ class Loop(Chain):
 
         return status
 
+    """
+    Return the strong and weak links emanating from the given link,
+    each as a dict from the link to its bitboard. Strong links are
+    simultaneously weak links but not vice versa. That is because
+    !A => B, the strong link condition, implies A => !B. Group links
+    are always strong links. But we are not including group links as
+    weak links.
+
+    The links are looked up from the given table, which memoizes them
+    for the duration of a pass along with the group links. The hints
+    don't change until the pass makes progress, at which point we
+    return anyway.
+    """
+    def loop_links(self, table, link, group_count):
+        links = table["links"]
+        key = (link, group_count < self.group_limit)
+        if not key in links:
+            slinks, wlinks, glinks = self.chain_find_links(link, table["groups"], group_count)
+            wlinks |= slinks
+            slinks |= glinks
+            links[key] = tuple(dict((x, self.chain_link_mask(x)) for x in y)
+                               for y in [slinks, wlinks])
+        return links[key]
+
     """
     Recusive AIC walk. It looks for and constructs all AIC's starting
-    from the head and following cycle path to the next link.
+    from the head and following cycle path to the next link. The union
+    of the bitboards of the links in the cycle and the number of group
+    links are maintained along the way, so that no step has to scan
+    the cycle. The walk stops at the given length limit, in which case
+    the fact is recorded in the given state.
     """
-    def loop_walk(self, cycle):
+    def loop_walk(self, table, cycle, used, group_count, limit, state):
         head, color = cycle[0]
         next, color = cycle[-1]
 
-        slinks, wlinks, glinks = self.chain_find_links(
-            next, len(self.chain_group_links(cycle)))
-
-        # Strong links are simultaneously weak links but not vice versa.
-        # That is because !A => B, the strong link condition, implies
-        # A => !B. Group links are always strong links. But we are not
-        # including group links as weak links.
-        wlinks |= slinks
-        slinks |= glinks
-
+        slinks, wlinks = self.loop_links(table, next, group_count)
         links = wlinks if color else slinks
 
         if len(cycle) > 2:
@@ -343,33 +361,39 @@ class Loop(Chain):
         # is, the more timing consuming it is to build it, due to the
         # exponentially increasing possibilities with each link being
         # appended.
-        if len(cycle) == self.length_limit:
+        if len(cycle) == limit:
+            state["cut"] = True
             return cycles
 
-        # Filter out duplicate links.
-        links = set([x for x in links if not self.chain_link_conflict(x, cycle)])
-
-        for link in links:
-            batch = self.loop_walk(cycle + [(link, not color)])
+        for link, mask in links.items():
+            # Filter out duplicate links.
+            if mask & used:
+                continue
+            count = group_count + 1 if self.chain_is_group_link(link) else group_count
+            batch = self.loop_walk(table, cycle + [(link, not color)], used | mask, count, limit, state)
             cycles.extend(batch)
         return cycles
 
     """
     Look for and process the AIC's starting from a single hint. Process
     the AIC's as we discover them and return as soon as some progress is
-    made from a new batch found.
+    made from a new batch found. The canonical forms of the AIC's seen
+    so far are kept in the given state.
     """
-    def loop(self, plan, i):
-        all = list()
+    def loop(self, plan, table, i, limit, state):
+        all = state["all"]
         for node in plan.get_sudoku().get_incomplete():
             if not i in node.get_hints():
                 continue
             status = False
-            cycles = self.loop_walk([(((node, ), i), False)])
+            head = ((node, ), i)
+            cycles = self.loop_walk(table, [(head, False)], self.chain_link_mask(head), 0, limit, state)
             for cycle in cycles:
-                if any([self.loop_duplicate(cycle, x) for x in all]):
-                    continue
-                all.append(cycle)
+                key = self.loop_canonical(cycle)
+                if key is not None:
+                    if key in all:
+                        continue
+                    all.add(key)
                 if self.loop_process(plan, cycle):
                     status = True
             if status:
@@ -385,11 +409,31 @@ class Loop(Chain):
     be running for a very very long time. Instead, we will return as soon
     as some, any, progress is made in hopes that it will enable the lower
     level strategies to make progress, which are much cheaper.
+
+    For the same reason, the search is iteratively deepened by default.
+    We look for all AIC's of length 4 first, then 6, and so on up to the
+    length limit, and stop at the first length that makes progress. The
+    short AIC's are much cheaper to find and often all we need, whereas
+    a single walk to the length limit explores the entire subtree before
+    trying the short ones. If no walk is cut short by the current length,
+    there is nothing more to be found deeper.
     """
     def run(self, plan):
-        for i in range(1, 10):
-            if self.loop(plan, i):
-                return True
+        limits = [self.length_limit]
+        if self.deepen:
+            limits = range(4, self.length_limit, 2) + limits
+        table = {"links": dict(), "groups": dict()}
+        if self.group_limit:
+            table["groups"] = self.chain_group_table(plan.get_sudoku())
+        states = dict((i, {"all": set(), "cut": True}) for i in range(1, 10))
+        for limit in limits:
+            for i in range(1, 10):
+                state = states[i]
+                if not state["cut"]:
+                    continue
+                state["cut"] = False
+                if self.loop(plan, table, i, limit, state):
+                    return True
         return False
 
 class XCycle(Loop):
@@ -7,6 +7,113 @@ from logger import *
 from playbook import *
 from sudoku import *
 
+class AlsCatalog(object):
+
+    """
+    Catalog of all ALS's in the lots of a Sudoku instance. Each ALS is
+    identified by its position in the catalog, under which we keep
+
+      1) the ALS itself as a frozenset of nodes
+      2) the bitboard of the nodes
+      3) the set of hints
+      4) the bitboard of the nodes with each hint
+      5) the bitboard of the nodes that can see all instances of each
+        hint, i.e., the bitboard equivalent of als_related()
+
+    The ALS's are also indexed by hint and node, so that the ones with
+    a given hint in a given node are found by lookup, and by their first
+    node, so that the ones within an area are found by lookup too. The
+    adjacency of ALS's by restricted common hints is built on first use.
+    """
+    def __init__(self, sudoku):
+        self.sudoku = sudoku
+        self.alsets = []
+        self.nodes = []
+        self.hints = []
+        self.masks = []
+        self.seen = []
+        self.index = dict((i, dict()) for i in range(1, 10))
+        self.first = dict()
+        self.links = None
+
+        ids = set()
+        for lot in sudoku.get_lots():
+            nodes = lot.get_incomplete()
+            bits = [sum([1 << (h - 1) for h in x.get_hints()]) for x in nodes]
+            for size in range(1, len(nodes)):
+                for combo in itertools.combinations(range(len(nodes)), size):
+                    hbits = 0
+                    for k in combo:
+                        hbits |= bits[k]
+                    if Bitmask.count(hbits) != size + 1:
+                        continue
+                    als = frozenset([nodes[k] for k in combo])
+                    if not als in ids:
+                        ids.add(als)
+                        self.add(als)
+
+    """
+    Add the ALS to the catalog.
+    """
+    def add(self, als):
+        k = len(self.alsets)
+        nodes = 0
+        masks = dict()
+        seen = dict()
+        for node in als:
+            index = node.get_index()
+            mask = 1 << index
+            peers = node.get_peer_mask()
+            nodes |= mask
+            for hint in node.get_hints():
+                masks[hint] = masks.get(hint, 0) | mask
+                seen[hint] = seen.get(hint, peers) & peers
+                self.index[hint].setdefault(index, []).append(k)
+
+        self.first.setdefault(Bitmask.first(nodes), []).append(k)
+        self.alsets.append(als)
+        self.nodes.append(nodes)
+        self.hints.append(set(masks.keys()))
+        self.masks.append(masks)
+        self.seen.append(seen)
+        return k
+
+    """
+    Return the ALS's that lie entirely within the given bitboard of
+    nodes as positions in the catalog.
+    """
+    def within(self, mask):
+        return [k for x in Bitmask.indices(mask) for k in self.first.get(x, [])
+                if not self.nodes[k] & ~mask]
+
+    """
+    Return the adjacency of the ALS's as a dict from each ALS to a list
+    of 2-tuples of another ALS and their set of restricted common hints.
+    ALS's are given by their positions in the catalog. Two ALS's that
+    don't overlap share a restricted common hint if all instances of the
+    hint in one are seen by all in the other. Only the ALS's with the
+    hint in the nodes seen are looked up as candidates.
+    """
+    def get_links(self):
+        if not self.links is None:
+            return self.links
+
+        self.links = dict((k, []) for k in range(len(self.alsets)))
+        for k in range(len(self.alsets)):
+            rcs = dict()
+            for hint, seen in self.seen[k].items():
+                index = self.index[hint]
+                for x in Bitmask.indices(seen):
+                    for j in index.get(x, []):
+                        if j <= k or self.nodes[j] & self.nodes[k]:
+                            continue
+                        if not self.masks[j][hint] & ~seen:
+                            rcs.setdefault(j, set()).add(hint)
+            for j, hints in rcs.items():
+                self.links[k].append((j, hints))
+                self.links[j].append((k, hints))
+        return self.links
+
 class AlmostLockedSet(Strategy):
 
     """
@@ -38,49 +145,15 @@ class AlmostLockedSet(Strategy):
     Return the set of hints in the ALS.
     """
     def als_all_hints(self, als):
-        return set.union(*[x.get_hints() for x in als if not x.is_complete()])
-
-    """
-    Return the set of all unique ALS's in the given lots. If a list
-    of sizes is specified, only those ALS's of the desired sizes are
-    returned.
-    """
-    def als_find_in_lots(self, lots, sizes = None):
-        alsets = set()
-        for lot in lots:
-            alsets |= self.als_do_find(lot.get_incomplete(), sizes, True)
-        return alsets
-
-    """
-    Return the set of all unique ALS's among the given nodes, some of
-    which may be complete and not all of which have to be related.
-    """
-    def als_find_in_nodes(self, nodes, sizes = None):
-        nodes = [x for x in nodes if not x.is_complete()]
-        return self.als_do_find(nodes, sizes)
+        hsets = [x.get_hints() for x in als if not x.is_complete()]
+        return set.union(*hsets) if hsets else set()
 
     """
-    Helper function.
+    Return the catalog of all ALS's in the lots of the Sudoku instance,
+    which is shared with the other strategies through the instance.
     """
-    def als_do_find(self, nodes, sizes = None, related = False):
-        alsets = set()
-        lens = sizes if sizes else [x + 1 for x in range(len(nodes))]
-        for i in lens:
-            for als in itertools.combinations(nodes, i):
-                if self.als_formed(als, related):
-                    alsets.add(frozenset(als))
-        return alsets
-
-    """
-    Return True if the given nodes form an ALS.
-    """
-    def als_formed(self, nodes, related = False):
-        hints = self.als_all_hints(nodes)
-        if len(hints) != len(nodes) + 1:
-            return False
-        if related:
-            return True
-        return all([x.is_related(y) for x in nodes for y in nodes if y != x])
+    def als_catalog(self, sudoku):
+        return sudoku.get_derived("ALS", AlsCatalog)
 
     """
     Return the restricted and unrestricted common hints between the
@@ -100,14 +173,6 @@ class AlmostLockedSet(Strategy):
 
         return (rcs, intersect - rcs)
 
-    """
-    Return True if the two ALS's are exclusively linked, i.e., sharing
-    a restricted common hint.
-    """
-    def als_linked(self, als1, als2):
-        rcs, ucs = self.als_urc_hints(als1, als2)
-        return bool(rcs)
-
     """
     Return the set of nodes that can see all instances of the given
     hint in the ALS.
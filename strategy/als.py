@@ -2,7 +2,6 @@
 # Almost Locked Set (ALS) strategy module
 #
 
-import itertools
 from logger import *
 from playbook import *
 from sudoku import *
@@ -103,16 +102,19 @@ class ALS(AlmostLockedSet):
             raise LogicException(reason)
 
     """
-    ALS strategy.
+    ALS strategy. Only the pairs of ALS's adjacent by restricted common
+    hints in the catalog are processed.
     """
     def run(self, plan):
         status = False
-        alsets = self.als_find_in_lots(plan.get_sudoku().get_lots())
-        for als1, als2 in itertools.combinations(alsets, 2):
-            if any([x.is_complete() for x in als1 | als2]):
-                continue
-            if als1 & als2:
-                continue
-            if self.als(plan, als1, als2):
-                status = True
+        catalog = self.als_catalog(plan.get_sudoku())
+        for k, links in catalog.get_links().items():
+            for j, rcs in links:
+                if j < k:
+                    continue
+                als1, als2 = catalog.alsets[k], catalog.alsets[j]
+                if any([x.is_complete() for x in als1 | als2]):
+                    continue
+                if self.als(plan, als1, als2):
+                    status = True
         return status
@@ -19,45 +19,55 @@ class APE(AlmostLockedSet):
 
     The strategy works by enumerating all combinations of hints among the
     pair of nodes and then eliminate some via conflict with ALS.
+
+    Only aligned pairs, i.e., nodes that see each other, with no more
+    than the given number of hints each are tried, since the more hints
+    the less likely all combinations with one of them can be excluded.
+    The ALS's both nodes see are looked up from the ALS catalog by the
+    bitboard of their common peers, and the pairs of hints each ALS
+    rules out are computed once per catalog.
     """
-    def __init__(self):
+    def __init__(self, hint_limit = 5):
         AlmostLockedSet.__init__(self, "APE")
+        self.hint_limit = hint_limit
 
     """
-    Check if the given pair of hints, one for each node in the aligned pair,
-    can be eliminated by an ALS.
+    Return the pairs of hints ruled out by the ALS at the given position
+    in the catalog, which are all pairs of its hints. The pairs are kept
+    in the given dict for reuse.
     """
-    def ape_exclude(self, alsets, hints):
-        for als in alsets:
-            if hints <= self.als_all_hints(als):
-                return als
-        return None
+    def ape_pairs(self, catalog, k, memo):
+        if not k in memo:
+            memo[k] = [frozenset(x) for x in itertools.combinations(sorted(catalog.hints[k]), 2)]
+        return memo[k]
 
     """
     Exclude hints from the given pair of nodes.
     """
-    def ape(self, plan, pair):
+    def ape(self, plan, catalog, memo, pair):
         node, other = pair
 
         # Look for ALS's among those both nodes in the pair can see.
-        overlap = [x for x in node.find_related() & other.find_related() if not x in pair]
-        alsets = self.als_find_in_nodes(overlap)
-        if not alsets:
+        overlap = node.get_peer_mask() & other.get_peer_mask()
+        overlap &= ~node.get_mask() & ~other.get_mask()
+        excluded = dict()
+        for k in catalog.within(overlap):
+            for x in self.ape_pairs(catalog, k, memo):
+                excluded.setdefault(x, k)
+        if not excluded:
             return False
 
         hints = set()
         excl = list()
         for candidate in [(h, o) for h in node.get_hints() for o in other.get_hints()]:
+            # Aligned nodes cannot take the same hint.
             if candidate[0] == candidate[1]:
-                # "Unaligned" APE.
-                if not node.is_related(other):
-                    hints.add(candidate)
                 continue
-            als = self.ape_exclude(alsets, set(candidate))
-            if not als:
+            k = excluded.get(frozenset(candidate))
+            if k is None:
                 hints.add(candidate)
             else:
-                excl.append((candidate, als))
+                excl.append((candidate, catalog.alsets[k]))
 
         nhints = set([h for h, o in hints])
         ohints = set([o for h, o in hints])
@@ -74,10 +84,22 @@ class APE(AlmostLockedSet):
     """
     def run(self, plan):
         status = False
-        nodes = plan.get_sudoku().get_incomplete()
-        for pair in itertools.combinations(nodes, 2):
-            if any([x.is_complete() for x in pair]):
-                continue
-            if self.ape(plan, pair):
-                status = True
+        sudoku = plan.get_sudoku()
+        catalog = self.als_catalog(sudoku)
+        memo = dict()
+
+        mask = 0
+        for node in sudoku.get_incomplete():
+            if len(node.get_hints()) <= self.hint_limit:
+                mask |= node.get_mask()
+
+        for node in sudoku.mask_nodes(mask):
+            # Pair up with the nodes that come later only.
+            later = mask & node.get_peer_mask() & ~((node.get_mask() << 1) - 1)
+            for other in sudoku.mask_nodes(later):
+                pair = (node, other)
+                if any([x.is_complete() for x in pair]):
+                    continue
+                if self.ape(plan, catalog, memo, pair):
+                    status = True
         return status
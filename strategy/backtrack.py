@@ -0,0 +1,179 @@
+#
+# Backtracking search base module
+#
+
+from logger import *
+from sudoku import *
+
+class Backtrack(object):
+
+    """
+    Lightweight depth first search over the candidates of a Sudoku
+    instance, used to test guesses and to finish boards outright where
+    the strategies fail. The board is kept as a list of 81 candidate
+    bitmasks, where bit (hint - 1) stands for the hint, so that a copy
+    is all it takes to branch.
+
+    Candidates are propagated by naked and hidden singles. A node down
+    to a single candidate removes it from all its peers. A hint left
+    in a single node of a lot is taken by that node. A node without any
+    candidate, a lot missing a hint, or a node forced to take two hints
+    is a contradiction. The search branches on the node with the fewest
+    candidates left.
+    """
+    PEERS = None
+    UNITS = None
+
+    """
+    The engine is set up from the Sudoku instance, or from the list of
+    candidates of another engine if given instead, e.g., in a worker
+    process.
+    """
+    def __init__(self, sudoku, cands = None):
+        self.setup()
+        if cands is None:
+            cands = []
+            for node in sudoku.mask_nodes((1 << 81) - 1):
+                if node.is_complete():
+                    cands.append(1 << (node.get_value() - 1))
+                else:
+                    cands.append(sum([1 << (h - 1) for h in node.get_hints()]))
+        self.cands = list(cands)
+        self.steps = 0
+
+    """
+    Compute the peers of each node and the nodes of each lot by index
+    once for all instances.
+    """
+    @staticmethod
+    def setup():
+        if not Backtrack.PEERS is None:
+            return
+        rows = [[i * 9 + j for j in range(9)] for i in range(9)]
+        cols = [[i * 9 + j for i in range(9)] for j in range(9)]
+        boxes = [[(k / 3 * 3 + i) * 9 + k % 3 * 3 + j for i in range(3) for j in range(3)]
+                 for k in range(9)]
+        Backtrack.UNITS = rows + cols + boxes
+        peers = [set() for x in range(81)]
+        for unit in Backtrack.UNITS:
+            for x in unit:
+                peers[x] |= set(unit)
+        Backtrack.PEERS = [sorted(peers[x] - set([x])) for x in range(81)]
+
+    """
+    Propagate the naked and hidden singles from the nodes in the queue
+    until no more is found. The candidates and the done flags of nodes
+    whose single candidates have been propagated are updated in place.
+    Return False on contradiction.
+    """
+    def propagate(self, cands, done, queue):
+        peers = Backtrack.PEERS
+        while True:
+            while queue:
+                x = queue.pop()
+                if done[x]:
+                    continue
+                done[x] = True
+                bit = cands[x]
+                for y in peers[x]:
+                    c = cands[y]
+                    if c & bit:
+                        c &= ~bit
+                        if not c:
+                            return False
+                        cands[y] = c
+                        if not c & (c - 1):
+                            queue.append(y)
+
+            for unit in Backtrack.UNITS:
+                once = 0
+                twice = 0
+                for x in unit:
+                    twice |= once & cands[x]
+                    once |= cands[x]
+                if once != 0x1ff:
+                    return False
+                singles = once & ~twice
+                if not singles:
+                    continue
+                for x in unit:
+                    c = cands[x] & singles
+                    if c and c != cands[x]:
+                        if c & (c - 1):
+                            return False
+                        cands[x] = c
+                        queue.append(x)
+
+            if not queue:
+                return True
+
+    """
+    Take the given guesses, as 2-tuples of node index and hint, and
+    propagate them. Return the candidates propagated or None on
+    contradiction.
+    """
+    def test(self, guesses):
+        cands = list(self.cands)
+        for x, hint in guesses:
+            bit = 1 << (hint - 1)
+            if not cands[x] & bit:
+                return None
+            cands[x] = bit
+        queue = [x for x in range(81) if not cands[x] & (cands[x] - 1)]
+        if not self.propagate(cands, [False] * 81, queue):
+            return None
+        return cands
+
+    """
+    Search depth first for a solution from the given propagated state.
+    """
+    def search(self, cands, done):
+        self.steps += 1
+        best = None
+        for x in range(81):
+            if not done[x]:
+                n = Bitmask.count(cands[x])
+                if best is None or n < best[0]:
+                    best = (n, x)
+                    if n == 2:
+                        break
+        if best is None:
+            return cands
+
+        x = best[1]
+        for i in Bitmask.indices(cands[x]):
+            copy = list(cands)
+            copy[x] = 1 << i
+            flags = list(done)
+            if self.propagate(copy, flags, [x]):
+                solution = self.search(copy, flags)
+                if solution:
+                    return solution
+        return None
+
+    """
+    Return the solution as a list of 81 values in the order of node
+    indices, or None if there is none.
+    """
+    def solve(self):
+        cands = self.test(())
+        if cands is None:
+            return None
+        done = [not c & (c - 1) for c in cands]
+        solution = self.search(cands, done)
+        return [Backtrack.value(x) for x in solution] if solution else None
+
+    """
+    Return True if the given candidates are solved, i.e., down to a
+    single one for each node.
+    """
+    @staticmethod
+    def solved(cands):
+        return all([not c & (c - 1) for c in cands])
+
+    """
+    Return the value of the given single candidate bitmask.
+    """
+    @staticmethod
+    def value(c):
+        return c.bit_length()
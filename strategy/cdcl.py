@@ -0,0 +1,249 @@
+#
+# Conflict driven clause learning base module
+#
+
+from logger import *
+from sudoku import *
+
+class Cdcl(object):
+
+    """
+    Conflict driven clause learning (CDCL) search over the candidates
+    of a Sudoku instance encoded as a boolean satisfiability problem.
+    Each of the 729 candidates, i.e., a hint in a node, is a variable
+    numbered as
+
+      index * 9 + hint - 1
+
+    where index is the position of the node on the board. A literal is
+    twice the variable for the candidate taken, plus one for the
+    candidate ruled out. Each node and each hint in a lot is a group of
+    9 candidates, for which we add a clause that one of them is taken
+    and a clause for each pair that not both are taken. Candidates no
+    longer in the Sudoku instance are ruled out upfront. Nodes without
+    hints yet are given the values missing from their lots.
+
+    Clauses are propagated with two watched literals each, so that only
+    the clauses watching a literal ruled out are visited. On conflict,
+    a clause is learned at the first unique implication point and the
+    search jumps back to the second highest level in it rather than to
+    the last decision. Decisions take the candidate with the highest
+    activity, bumped for the variables involved in conflicts.
+    """
+    def __init__(self, sudoku):
+        self.clauses = []
+        self.watches = [[] for x in range(729 * 2)]
+        self.truth = [None] * (729 * 2)
+        self.level = [0] * 729
+        self.reason = [None] * 729
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.activity = [0.0] * 729
+        self.bump = 1.0
+        self.learned = []
+        self.conflicts = 0
+
+        rows = [[i * 9 + j for j in range(9)] for i in range(9)]
+        cols = [[i * 9 + j for i in range(9)] for j in range(9)]
+        boxes = [[(k / 3 * 3 + i) * 9 + k % 3 * 3 + j for i in range(3) for j in range(3)]
+                 for k in range(9)]
+        groups = [[x * 9 + h for h in range(9)] for x in range(81)]
+        for unit in rows + cols + boxes:
+            groups.extend([[x * 9 + h for x in unit] for h in range(9)])
+        for group in groups:
+            self.add_clause([v * 2 for v in group])
+            for i in range(len(group)):
+                for j in range(i + 1, len(group)):
+                    self.add_clause([group[i] * 2 + 1, group[j] * 2 + 1])
+
+        for node in sudoku.mask_nodes((1 << 81) - 1):
+            index = node.get_index()
+            if node.is_complete():
+                hints = set([node.get_value()])
+            elif node.has_hints():
+                hints = node.get_hints()
+            else:
+                hints = set.intersection(*[x.get_missing_values() for x in node.get_lots()])
+            for hint in range(1, 10):
+                if not hint in hints:
+                    self.assign((index * 9 + hint - 1) * 2 + 1, None)
+
+    """
+    Add the clause, given as a list of at least 2 literals, and watch
+    its first 2 literals. Return the position of the clause.
+    """
+    def add_clause(self, lits):
+        k = len(self.clauses)
+        self.clauses.append(lits)
+        self.watches[lits[0]].append(k)
+        self.watches[lits[1]].append(k)
+        return k
+
+    """
+    Make the literal true at the current level for the given reason,
+    i.e., the position of the clause implying it, or None for decisions
+    and facts.
+    """
+    def assign(self, lit, reason):
+        v = lit >> 1
+        self.truth[lit] = True
+        self.truth[lit ^ 1] = False
+        self.level[v] = len(self.limits)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    """
+    Propagate the literals on the trail not propagated yet. Return the
+    position of the conflicting clause, or None if there is none. The
+    literal ruled out is kept second in each clause visited, so that the
+    first literal of a clause implying another is always the one implied.
+    """
+    def propagate(self):
+        truth = self.truth
+        clauses = self.clauses
+        watches = self.watches
+        while self.head < len(self.trail):
+            false = self.trail[self.head] ^ 1
+            self.head += 1
+            visit = watches[false]
+            watches[false] = keep = []
+            for i in range(len(visit)):
+                k = visit[i]
+                c = clauses[k]
+                if c[0] == false:
+                    c[0], c[1] = c[1], false
+                if truth[c[0]]:
+                    keep.append(k)
+                    continue
+                for j in range(2, len(c)):
+                    if truth[c[j]] is not False:
+                        c[1], c[j] = c[j], false
+                        watches[c[1]].append(k)
+                        break
+                else:
+                    keep.append(k)
+                    if truth[c[0]] is False:
+                        keep.extend(visit[i + 1:])
+                        self.head = len(self.trail)
+                        return k
+                    self.assign(c[0], k)
+        return None
+
+    """
+    Learn a clause from the conflicting clause at the first unique
+    implication point. Return the clause, with the literal to assert
+    first and the one at the level to jump back to second, and that
+    level.
+    """
+    def analyze(self, conflict):
+        current = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        lit = None
+        k = conflict
+        i = len(self.trail) - 1
+        while True:
+            c = self.clauses[k]
+            for q in (c if lit is None else c[1:]):
+                v = q >> 1
+                if v in seen or self.level[v] == 0:
+                    continue
+                seen.add(v)
+                self.activity[v] += self.bump
+                if self.level[v] == current:
+                    pending += 1
+                else:
+                    learned.append(q)
+            while not self.trail[i] >> 1 in seen:
+                i -= 1
+            lit = self.trail[i]
+            i -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            k = self.reason[lit >> 1]
+        learned[0] = lit ^ 1
+
+        level = 0
+        for j in range(2, len(learned)):
+            if self.level[learned[j] >> 1] > self.level[learned[1] >> 1]:
+                learned[1], learned[j] = learned[j], learned[1]
+        if len(learned) > 1:
+            level = self.level[learned[1] >> 1]
+
+        self.bump /= 0.95
+        if self.bump > 1e100:
+            self.activity = [x * 1e-100 for x in self.activity]
+            self.bump *= 1e-100
+        return (learned, level)
+
+    """
+    Undo all assignments above the given level.
+    """
+    def backjump(self, level):
+        if len(self.limits) <= level:
+            return
+        limit = self.limits[level]
+        for lit in self.trail[limit:]:
+            self.truth[lit] = None
+            self.truth[lit ^ 1] = None
+            self.reason[lit >> 1] = None
+        del self.trail[limit:]
+        del self.limits[level:]
+        self.head = limit
+
+    """
+    Take the candidate not assigned yet with the highest activity at a
+    new level. Return False if all candidates are assigned.
+    """
+    def decide(self):
+        best = None
+        for v in range(729):
+            if self.truth[v * 2] is None:
+                if best is None or self.activity[v] > self.activity[best]:
+                    best = v
+        if best is None:
+            return False
+        self.limits.append(len(self.trail))
+        self.assign(best * 2, None)
+        return True
+
+    """
+    Return the solution as a list of 81 values in the order of node
+    indices, or None if there is none.
+    """
+    def solve(self):
+        while True:
+            conflict = self.propagate()
+            if conflict is None:
+                if not self.decide():
+                    break
+                continue
+
+            self.conflicts += 1
+            if not self.limits:
+                return None
+            learned, level = self.analyze(conflict)
+            self.learned.append(learned)
+            self.backjump(level)
+            if len(learned) == 1:
+                self.assign(learned[0], None)
+            else:
+                self.assign(learned[0], self.add_clause(list(learned)))
+
+        solution = [0] * 81
+        for v in range(729):
+            if self.truth[v * 2]:
+                solution[v / 9] = v % 9 + 1
+        return solution
+
+    """
+    Return the clauses learned as nogoods, i.e., lists of candidates as
+    3-tuples of node index, hint, and whether it is taken, that can't
+    all hold together.
+    """
+    def nogoods(self):
+        return [[((q >> 1) / 9, (q >> 1) % 9 + 1, bool(q & 1)) for q in c]
+                for c in self.learned]
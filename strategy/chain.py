@@ -46,9 +46,10 @@ class Chain(Strategy):
     A strong link between A and B is one that !A => B and a weak
     link A => !B. A bi-location link is one that connects two nodes
     with the same hint whereas a bi-value link connects two hints
-    in the same node.
+    in the same node. Group links are looked up from the given table
+    built by chain_group_table().
     """
-    def chain_find_links(self, link, group_count = 0):
+    def chain_find_links(self, link, groups, group_count = 0):
         group, i = link
         node = group[0]
 
@@ -90,7 +91,7 @@ class Chain(Strategy):
         # node link.
         glinks = set()
         if group_count < self.group_limit and not self.chain_is_group_link(link):
-            glinks |= self.chain_find_group_links(link, wsets)
+            glinks |= set(groups.get(link, []))
 
         return (slinks, wlinks, glinks)
 
@@ -104,26 +105,37 @@ class Chain(Strategy):
       2) aligned in the same row or col.
 
     Otherwise, we will not be able to make both an incoming and outgoing
-    links to and from it.
-    """
-    def chain_find_group_links(self, link, wsets):
-        glinks = set()
-
-        # Check if the set of all weak links from one lot form a
-        # group link. If so, the group link formed must be a strong
-        # link since there are no more weak links elsewhere.
-        for wset in wsets:
-            assert len(wset) > 1
-            # Check if the weak nodes all reside in the same box.
-            if len(set([x.get_box() for x in wset])) > 1:
-                continue
-            # Check if the weak nodes are either row or col aligned.
-            if len(set([x.get_row() for x in wset])) > 1 and \
-                    len(set([x.get_col() for x in wset])) > 1:
-                continue
-            glinks.add((tuple(wset), link[1]))
-
-        return glinks
+    links to and from it. In other words, the group must fit in one of
+    the 54 segments where a box intersects a row or col.
+
+    Return the table of group links for a Sudoku instance, which maps
+    each node link to the group links from it. The set of all weak links
+    from one lot forms a group link if it fits in a segment. The group
+    link formed must be a strong link since there are no more weak links
+    elsewhere. The table is computed once per pass from the bitboards
+    of the segments and of each hint.
+    """
+    def chain_group_table(self, sudoku):
+        segments = [box.get_mask() & lot.get_mask() for box in sudoku.get_boxes()
+                    for lot in sudoku.get_rows() + sudoku.get_cols()
+                    if box.get_mask() & lot.get_mask()]
+
+        lsegments = dict((lot, [x for x in segments if not x & ~lot.get_mask()])
+                         for lot in sudoku.get_lots())
+
+        table = dict()
+        for i in range(1, 10):
+            hmask = sudoku.get_hint_mask(i)
+            for lot in sudoku.get_lots():
+                lmask = lot.get_mask() & hmask
+                if Bitmask.count(lmask) < 3:
+                    continue
+                for node in sudoku.mask_nodes(lmask):
+                    others = lmask & ~node.get_mask()
+                    if any([not others & ~x for x in lsegments[lot]]):
+                        group = (tuple(sudoku.mask_nodes(others)), i)
+                        table.setdefault(((node, ), i), []).append(group)
+        return table
 
     """
     Find the collective area covered by a list of groups. This is
@@ -154,6 +166,19 @@ class Chain(Strategy):
     def chain_has_group_links(self, chain):
         return bool(self.chain_group_links(chain))
 
+    """
+    Return the bitboard of the given link over all pairs of node and
+    hint, where bit (index * 9 + hint - 1) stands for the hint in the
+    node at the given index. Two links conflict if and only if their
+    bitboards overlap.
+    """
+    def chain_link_mask(self, link):
+        group, i = link
+        mask = 0
+        for node in group:
+            mask |= 1 << (node.get_index() * 9 + i - 1)
+        return mask
+
     """
     Return True if the given link conflicts with at least another
     in the chain. Conflict implies hint matching _and_ node group
@@ -2,7 +2,6 @@
 # Death Blossom strategy module
 #
 
-import itertools
 from logger import *
 from playbook import *
 from sudoku import *
@@ -32,66 +31,94 @@ class DeathBlossom(AlmostLockedSet):
     stem whereas node XZ and YZ are the petals, except that the parts
     that make Death Blossom are ALS's not nodes.
 
-    Given the added dimension from a third ALS, Death Blossom can be
-    orders of magnitude more expensive than plain ALS. To cap the cost,
-    an artificial limit is placed on the size of the stem and petals.
+    More generally, the stem is an ALS of N nodes with N + 1 hints, at
+    least N of which must be taken by the stem. For each stem hint, a
+    petal is an ALS sharing it with the stem as a restricted common
+    hint, so that the petal is locked, and takes Z, should the stem take
+    the hint. If each stem hint other than Z has a petal with Z in it,
+    Z must be taken by one of the petals or the stem, and can then be
+    eliminated from all nodes that see all instances of Z in them.
+
+    The petals are bucketed per stem hint from the restricted common
+    hint adjacency in the ALS catalog, and the blossoms for each stem
+    and Z are assembled by choosing one petal from each bucket. The
+    nodes seeing Z in all petals chosen so far are kept as a bitboard,
+    which prunes the search as soon as no elimination is left. The
+    limits on the size of the stem and petals are therefore generous.
     """
-    def __init__(self, stem_limit = 1, petal_limit = 4):
+    def __init__(self, stem_limit = 3, petal_limit = 6):
         AlmostLockedSet.__init__(self, "DEATH-BLOSSOM")
         self.stem_limit = stem_limit
         self.petal_limit = petal_limit
 
     """
-    Find the stem in the Death Blossom.
+    Return the petals of the stem bucketed by stem hint, which are the
+    ALS's within the petal limit that share the hint with the stem as a
+    restricted common hint. All ALS's are positions in the catalog.
     """
-    def death_blossom_verify(self, stem, petal1, petal2):
-        x, ucs = self.als_urc_hints(petal1, petal2)
-        if x or not ucs:
-            return None
-        rcs1, x = self.als_urc_hints(stem, petal1)
-        rcs2, x = self.als_urc_hints(stem, petal2)
-        if not rcs1 or not rcs2:
-            return None
-        rcs = rcs1 | rcs2
-        if len(rcs) < 2:
-            return None
-        ucs -= rcs
-        return (rcs, ucs)
+    def death_blossom_petals(self, catalog, stem):
+        buckets = dict((x, []) for x in catalog.hints[stem])
+        for petal, rcs in catalog.get_links()[stem]:
+            if len(catalog.alsets[petal]) <= self.petal_limit:
+                for hint in rcs:
+                    buckets[hint].append(petal)
+        return buckets
 
     """
-    Verify and process the death blossom pattern.
+    Choose one petal with Z from the bucket of each of the given stem
+    hints, narrowing down the bitboard of nodes seeing all instances of
+    Z along the way. Return the petals and the bitboard of nodes left
+    or None if no elimination is possible.
     """
-    def death_blossom(self, plan, stem, petal1, petal2):
-        status = False
+    def death_blossom_choose(self, catalog, buckets, hints, z, mask, petals = ()):
+        if not hints:
+            return (petals, mask)
+        for petal in buckets[hints[0]]:
+            if not z in catalog.hints[petal]:
+                continue
+            m = mask & catalog.seen[petal][z] & ~catalog.nodes[petal]
+            if not m:
+                continue
+            found = self.death_blossom_choose(catalog, buckets, hints[1:], z, m, petals + (petal, ))
+            if found:
+                return found
+        return None
 
-        hsets = self.death_blossom_verify(stem, petal1, petal2)
-        if not hsets:
-            return status
-        rcs, ucs = hsets
-
-        reason = {"stem": stem, "petal1": petal1, "petal2": petal2,
-                  "rcs": rcs, "ucs": ucs}
-        for hint in ucs:
-            overlap = self.als_related(petal1, hint) & self.als_related(petal2, hint)
-            if self.test_purge(overlap, set([hint])):
-                self.purge_hints(plan, overlap, set([hint]), reason)
-                status = True
-
-        return status
+    """
+    Look for and process the death blossom pattern with the given stem
+    and the hint Z to be eliminated.
+    """
+    def death_blossom(self, plan, catalog, stem, buckets, z):
+        sudoku = plan.get_sudoku()
+        mask = sudoku.get_hint_mask(z) & ~catalog.nodes[stem]
+        if z in catalog.hints[stem]:
+            mask &= catalog.seen[stem][z]
+
+        hints = sorted(catalog.hints[stem] - set([z]))
+        found = self.death_blossom_choose(catalog, buckets, hints, z, mask)
+        if not found:
+            return False
+
+        petals, mask = found
+        nodes = sudoku.mask_nodes(mask)
+        if self.test_purge(nodes, set([z])):
+            reason = {"stem": catalog.alsets[stem],
+                      "petals": [catalog.alsets[x] for x in petals],
+                      "rcs": set(hints), "ucs": set([z])}
+            self.purge_hints(plan, nodes, set([z]), reason)
+            return True
+        return False
 
     """
     Death Blossom strategy.
     """
     def run(self, plan):
-        lots = plan.get_sudoku().get_lots()
-
-        stems = self.als_find_in_lots(lots, range(1, self.stem_limit + 1))
-        petals = self.als_find_in_lots(lots, range(1, self.petal_limit + 1))
-
-        for stem in stems:
-            for petal1, petal2 in itertools.combinations(petals, 2):
-                if stem & petal1 or stem & petal2 or petal1 & petal2:
-                    continue
-                if self.death_blossom(plan, stem, petal1, petal2):
+        catalog = self.als_catalog(plan.get_sudoku())
+        for stem in range(len(catalog.alsets)):
+            if len(catalog.alsets[stem]) > self.stem_limit:
+                continue
+            buckets = self.death_blossom_petals(catalog, stem)
+            for z in range(1, 10):
+                if self.death_blossom(plan, catalog, stem, buckets, z):
                     return True
         return False
@@ -0,0 +1,155 @@
+#
+# Exact cover solver module
+#
+
+from logger import *
+from sudoku import *
+
+class ExactCover(object):
+
+    """
+    Sudoku as an exact cover problem solved by Algorithm X. Each row of
+    the matrix is a candidate, i.e., a hint in a node, numbered as
+
+      index * 9 + hint - 1
+
+    where index is the position of the node on the board. Each row
+    covers 4 of the 324 constraints, numbered in 4 blocks of 81.
+
+      1) the node has a value
+      2) the row has the hint
+      3) the col has the hint
+      4) the box has the hint
+
+    A solution is a set of rows covering each constraint exactly once.
+    Rather than the doubly linked lists of Dancing Links, the columns
+    are kept as a dict from each constraint to the set of rows covering
+    it, which serves the same purpose of removing and restoring rows and
+    columns in place as the search goes down and back up. The search
+    always branches on the constraint with the fewest rows left.
+
+    Only the candidates left in the Sudoku instance are in the matrix,
+    so it must be valid for the hints. Nodes without hints yet are
+    given the values missing from their lots.
+    """
+    def __init__(self, sudoku):
+        self.rows = dict()
+        for node in sudoku.mask_nodes((1 << 81) - 1):
+            index = node.get_index()
+            i, j = divmod(index, 9)
+            k = i / 3 * 3 + j / 3
+            for hint in self.candidates(node):
+                h = hint - 1
+                self.rows[index * 9 + h] = [index, 81 + i * 9 + h, 162 + j * 9 + h, 243 + k * 9 + h]
+        self.steps = 0
+
+    """
+    Return the candidates of the given node.
+    """
+    def candidates(self, node):
+        if node.is_complete():
+            return [node.get_value()]
+        if node.has_hints():
+            return node.get_hints()
+        return set.intersection(*[x.get_missing_values() for x in node.get_lots()])
+
+    """
+    Return a fresh copy of the columns of the matrix.
+    """
+    def columns(self):
+        cols = dict((x, set()) for x in range(324))
+        for r, cs in self.rows.items():
+            for c in cs:
+                cols[c].add(r)
+        return cols
+
+    """
+    Select the row in the solution, removing all the columns it covers
+    and all other rows covering those columns. Return the columns
+    removed for deselect().
+    """
+    def select(self, cols, r):
+        removed = []
+        for c in self.rows[r]:
+            for x in cols[c]:
+                for y in self.rows[x]:
+                    if y != c:
+                        cols[y].remove(x)
+            removed.append(cols.pop(c))
+        return removed
+
+    """
+    Undo select() in the reverse order.
+    """
+    def deselect(self, cols, r, removed):
+        for c in reversed(self.rows[r]):
+            cols[c] = removed.pop()
+            for x in cols[c]:
+                for y in self.rows[x]:
+                    if y != c:
+                        cols[y].add(x)
+
+    """
+    Search for solutions and add them to the given list as lists of
+    rows. Return True once the limit is reached.
+    """
+    def search(self, cols, partial, solutions, limit):
+        self.steps += 1
+        if not cols:
+            solutions.append(list(partial))
+            return len(solutions) >= limit
+
+        c = min(cols, key = lambda x: len(cols[x]))
+        for r in list(cols[c]):
+            partial.append(r)
+            removed = self.select(cols, r)
+            stop = self.search(cols, partial, solutions, limit)
+            self.deselect(cols, r, removed)
+            partial.pop()
+            if stop:
+                return True
+        return False
+
+    """
+    Return up to the given number of solutions, each as a list of 81
+    values in the order of node indices.
+    """
+    def solutions(self, limit):
+        found = []
+        self.search(self.columns(), [], found, limit)
+        solutions = []
+        for rows in found:
+            values = [0] * 81
+            for r in rows:
+                values[r / 9] = r % 9 + 1
+            solutions.append(values)
+        return solutions
+
+    """
+    Return the number of solutions up to the given limit. The search
+    stops as soon as the limit is reached, so the default limit of 2
+    tells whether the solution is unique.
+    """
+    def count_solutions(self, limit = 2):
+        return len(self.solutions(limit))
+
+    """
+    Return the solution as a list of 81 values in the order of node
+    indices, or None if there is none.
+    """
+    def solve(self):
+        solutions = self.solutions(1)
+        return solutions[0] if solutions else None
+
+    """
+    Return None if the Sudoku instance has a unique solution, or the
+    message telling why not otherwise. Strategies such as
+    UNIQUE-RECTANGLE rely on the solution being unique, so all entry
+    points check the instance first.
+    """
+    @staticmethod
+    def check(sudoku):
+        count = ExactCover(sudoku).count_solutions()
+        if count == 1:
+            return None
+        return "No solution!" if not count else "Multiple solutions!"
@@ -138,6 +138,143 @@ class FishBase(Strategy):
                     status = True
         return status
 
+class FrankenFish(FishBase):
+
+    __metaclass__ = StrategyMeta
+
+    """
+    FRANKEN-FISH is a single fish search that covers basic, finned,
+    sashimi, and Franken fish of all sizes up to the given dimension.
+    Rather than testing lattices of rows and cols, a fish is stated
+    in terms of N base lots and N cover lots for a given hint.
+
+      1) The base lots don't share any instance of the hint.
+      2) The cover lots hold all instances of the hint in the base
+        lots, except for the fins, which must reside in a single box.
+
+    Each base lot must take the hint exactly once and each cover lot
+    may take it at most once. So if no fin is taken, the hint in the
+    cover lots must all come from the base lots and the instances in
+    the cover lots outside the base lots can be eliminated. With fins,
+    only those instances that can also see all the fins are eligible.
+
+    Finned fish is one where the fins spill over from an otherwise
+    intact basic fish. Sashimi fish is one where the base lot that
+    carries the fins has lost part of the lattice as well. Franken
+    fish admits boxes into both base and cover lots, i.e., rows and
+    boxes against cols and boxes, or cols and boxes against rows and
+    boxes. All of them fall out of the same search.
+
+    The search runs on bitboards of the hint, which are computed once
+    per hint and shared across all fish sizes. Lots with less than two
+    instances of the hint are never considered as base lots. The cover
+    lots are assembled one at a time from the lots that cover the first
+    base instance not covered so far, which limits the branching to at
+    most three choices, including the choice of the instance being a
+    fin.
+    """
+    def __init__(self, dim = 3):
+        FishBase.__init__(self, "FRANKEN-FISH", dim, True)
+
+    """
+    Enumerate the combinations of base lots of size 2 up to the
+    dimension of the fish. The bitboard of the base hints is built
+    up incrementally and shared between the sizes. Lots that share
+    instances of the hint are not combined.
+    """
+    def fish_bases(self, bases, lmasks, start = 0, plots = (), area = 0):
+        if len(plots) > 1:
+            yield plots, area
+        if len(plots) == self.dim:
+            return
+        for k in range(start, len(bases)):
+            plot = bases[k]
+            if area & lmasks[plot]:
+                continue
+            for x in self.fish_bases(bases, lmasks, k + 1, plots + (plot, ), area | lmasks[plot]):
+                yield x
+
+    """
+    Find all sets of the given number of cover lots that cover the
+    base hints in the area except for fins in at most one box. Each
+    step covers the lowest base hint not yet covered, either by one
+    of its lots or by giving up its box to the fins. The lots and the
+    box bitboard of each position are looked up from the given table.
+    """
+    def fish_covers(self, table, lmasks, slots, area, size, covers = (), fin = False):
+        if not area:
+            return [frozenset(covers)] if len(covers) == size else []
+
+        lots, box = table[Bitmask.first(area)]
+        if len(covers) == size:
+            # Only the fins may be left uncovered at this point.
+            return [frozenset(covers)] if not fin and not area & ~box else []
+
+        results = []
+        for slot in lots:
+            if slot in slots:
+                results.extend(self.fish_covers(table, lmasks, slots, area & ~lmasks[slot],
+                                                size, covers + (slot, ), fin))
+        if not fin:
+            results.extend(self.fish_covers(table, lmasks, slots, area & ~box, size, covers, True))
+        return results
+
+    """
+    Look for fish with the given hint where the base lots are taken
+    from one family of lots and the cover lots from the other.
+    """
+    def franken_fish(self, plan, hint, table, lmasks, plots, slots):
+        status = False
+        sudoku = plan.get_sudoku()
+
+        bases = [x for x in plots if Bitmask.count(lmasks[x]) > 1]
+        for bplots, area in self.fish_bases(bases, lmasks):
+            size = len(bplots)
+            candidates = set([x for x in slots if lmasks[x] & area and not x in bplots])
+            if len(candidates) < size:
+                continue
+            for covers in set(self.fish_covers(table, lmasks, candidates, area, size)):
+                cover = 0
+                for slot in covers:
+                    cover |= lmasks[slot]
+                fins = area & ~cover
+                elims = cover & ~area
+                for x in Bitmask.indices(fins):
+                    elims &= sudoku.get_node_at(x).get_peer_mask()
+                if not elims:
+                    continue
+                nodes = sudoku.mask_nodes(elims)
+                hints = set([hint])
+                if self.test_purge(nodes, hints):
+                    reason = {"hints": hints, "plots": [], "covers": list(covers),
+                              "fin": sudoku.mask_nodes(fins) if fins else None}
+                    for plot in bplots:
+                        reason["plots"].append({"plot": plot, "nodes": sudoku.mask_nodes(lmasks[plot])})
+                    self.purge_hints(plan, nodes, hints, reason)
+                    status = True
+
+        return status
+
+    """
+    Identify and process fish patterns for each hint in both row and
+    col orientation.
+    """
+    def run(self, plan):
+        status = False
+        sudoku = plan.get_sudoku()
+        boxes = list(sudoku.get_boxes())
+        table = [(x.get_lots(), x.get_box().get_mask()) for x in sudoku.mask_nodes((1 << 81) - 1)]
+        for hint in range(1, 10):
+            mask = sudoku.get_hint_mask(hint)
+            lmasks = dict((x, x.get_mask() & mask) for x in sudoku.get_lots())
+            rows = list(sudoku.get_rows()) + boxes
+            cols = list(sudoku.get_cols()) + boxes
+            if self.franken_fish(plan, hint, table, lmasks, rows, cols):
+                status = True
+            if self.franken_fish(plan, hint, table, lmasks, cols, rows):
+                status = True
+        return status
+
 class XWing(FishBase):
 
     __metaclass__ = StrategyMeta
@@ -166,9 +303,22 @@ class FinnedXWing(FishBase):
     def __init__(self):
         FishBase.__init__(self, "FINNED X-WING", 2, True)
 
+    """
+    Superseded by FRANKEN-FISH, which covers finned fish in the same
+    search as the rest.
+    """
+    def default(self):
+        return False
+
 class FinnedSwordFish(FishBase):
 
     __metaclass__ = StrategyMeta
 
     def __init__(self):
         FishBase.__init__(self, "FINNED SWORD-FISH", 3, True)
+
+    """
+    See FinnedXWing.default().
+    """
+    def default(self):
+        return False
@@ -29,16 +29,20 @@ class ForcingChain(Chain):
         Chain.__init__(self, name, biloc_only, group_limit)
 
     """
-    Add a link between the specified locations in the forcing chain.
-    """
-    def forcing_chain_add_link(self, chain, loc, to, forward = True):
-        if not loc in chain:
-            chain[loc] = ([], [])
-        fore, back = chain[loc]
-        if forward:
-            fore.append(to)
-        else:
-            back.append(to)
+    Add the location to the forcing chain as discovered from the given
+    location, which is None for the origin. Along with the back link,
+    record the depth of the location and the number of group links on
+    the path from the origin, so that neither requires a walk back to
+    the origin later.
+    """
+    def forcing_chain_add_link(self, chain, loc, to):
+        depth, count = 0, 0
+        if loc:
+            back, depth, count = chain[loc]
+            depth += 1
+        if self.chain_is_group_link(to[0]):
+            count += 1
+        chain[to] = (loc, depth, count)
 
     """
     Check if the specified location is in the forcing chain.
@@ -49,25 +53,21 @@ class ForcingChain(Chain):
     """
     Return the original back link from the specified location. The
     original back link leads to the location in the forcing chain
-    from which this location is first discovered. Hence, it's always
-    the first item in the back list. The origin of the forcing chain
-    has no back links.
+    from which this location is first discovered. The origin of the
+    forcing chain has no back links.
     """
     def forcing_chain_back_link(self, chain, loc):
-        fore, back = chain[loc]
-        return back[0] if back else None
+        return chain[loc][0]
 
     """
     Find a path leading from the origin to the specified location by
     following the back link in the forcing chain.
     """
     def forcing_chain_find_path(self, chain, loc):
-        path = [loc]
-        while True:
+        path = [None] * (chain[loc][1] + 1)
+        for i in range(len(path) - 1, -1, -1):
+            path[i] = loc
             loc = self.forcing_chain_back_link(chain, loc)
-            if not loc:
-                break
-            path.insert(0, loc)
         return path
 
     """
@@ -79,39 +79,109 @@ class ForcingChain(Chain):
         return self.chain_format(path, verbose)
 
     """
-    Find the next set of links to walk from the specified location.
+    Walk the forcing chain breadth first from the origin until all
+    reachable locations are discovered. Group links are looked up from
+    the given table.
     """
-    def forcing_chain_find_links(self, chain, loc):
-        count = 0
-        if self.forcing_chain_has_link(chain, loc):
-            path = self.forcing_chain_find_path(chain, loc)
-            count = len(self.chain_group_links(path))
-        return self.chain_find_links(loc[0], count)
+    def forcing_chain_walk(self, origin, chain, groups):
+        self.forcing_chain_add_link(chain, None, origin)
+        locs = [origin]
+        for loc in locs:
+            link, color = loc
 
-    """
-    Recursively walk the forcing chain that started from the origin
-    and has reached the given location.
-    """
-    def forcing_chain_walk(self, loc, chain):
-        link, color = loc
+            slinks, wlinks, glinks = self.chain_find_links(link, groups, chain[loc][2])
+            wlinks |= slinks
+            slinks |= glinks
 
-        slinks, wlinks, glinks = self.forcing_chain_find_links(chain, loc)
-        wlinks |= slinks
-        slinks |= glinks
-
-        links = wlinks if color else slinks
+            for next in wlinks if color else slinks:
+                to = (next, not color)
+                if self.forcing_chain_has_link(chain, to):
+                    continue
+                self.forcing_chain_add_link(chain, loc, to)
+                locs.append(to)
 
-        nlocs = set()
-        for next in links:
-            to = (next, not color)
-            if self.forcing_chain_has_link(chain, to):
+    """
+    Return the bitboard of all hints remaining in the Sudoku instance
+    in the same form as chain_link_mask().
+    """
+    def forcing_chain_alive(self, sudoku):
+        mask = 0
+        for node in sudoku.get_incomplete():
+            for hint in node.get_hints():
+                mask |= 1 << (node.get_index() * 9 + hint - 1)
+        return mask
+
+    """
+    Return the bitboard, in the same form as chain_link_mask(), of all
+    the hints consulted while walking the forcing chain, i.e., the hint
+    of each link in the lots shared by its nodes, where its strong and
+    weak links are found, plus all hints in the node of each node link.
+    A link is strong precisely because other hints are gone, so removing
+    any hint in this area may change the links of the web.
+    """
+    def forcing_chain_scope(self, chain):
+        lmasks = dict()
+        scope = 0
+        for (group, i), color in chain.keys():
+            lots = set.intersection(*[set(x.get_lots()) for x in group])
+            for lot in lots:
+                if not (lot, i) in lmasks:
+                    lmasks[(lot, i)] = sum([1 << (x * 9 + i - 1)
+                                            for x in Bitmask.indices(lot.get_mask())])
+                scope |= lmasks[(lot, i)]
+            if not self.chain_is_group_link((group, i)):
+                scope |= 0x1ff << (group[0].get_index() * 9)
+        return scope
+
+    """
+    Return the forcing chain web from the given origin. The webs are
+    cached in the plan and shared between the forcing chain strategies.
+    A cached web is reused as long as none of the hints consulted while
+    walking it has been removed since, as given by the bitboard of the
+    hints alive.
+    """
+    def forcing_chain_web(self, plan, origin, groups, alive):
+        webs = plan.get_cache("FORCING-CHAIN")
+        key = (origin, self.biloc_only, self.group_limit)
+        if key in webs:
+            chain, scope, mask = webs[key]
+            if alive & scope == mask:
+                return chain
+
+        chain = dict()
+        self.forcing_chain_walk(origin, chain, groups)
+        scope = self.forcing_chain_scope(chain)
+        webs[key] = (chain, scope, alive & scope)
+        return chain
+
+    """
+    Process the webs from the given origins, of which one must be true,
+    such as all hints in a node or all nodes with a hint in a lot. Any
+    location found in all the webs holds regardless of which origin is
+    true. Return True as soon as some progress is made.
+    """
+    def forcing_chain_common(self, plan, origins, groups, alive, note):
+        webs = [self.forcing_chain_web(plan, x, groups, alive) for x in origins]
+        common = set.intersection(*[set(x.keys()) for x in webs])
+        for loc in common:
+            link, color = loc
+            if self.chain_is_group_link(link):
                 continue
-            self.forcing_chain_add_link(chain, loc, to, True)
-            self.forcing_chain_add_link(chain, to, loc, False)
-            nlocs.add(to)
-
-        for nloc in nlocs:
-            self.forcing_chain_walk(nloc, chain);
+            (node, ), hint = link
+            if node.is_complete():
+                continue
+            hints = set([hint])
+            reason = {
+                "chain": [self.forcing_chain_format(x, loc, False) for x in webs],
+                "__chain__": [self.forcing_chain_find_path(x, loc) for x in webs],
+                }
+            if color and self.test_update([node], hints):
+                self.update_hints(plan, [node], hints, reason, note + " true")
+                return True
+            if not color and self.test_purge([node], hints):
+                self.purge_hints(plan, [node], hints, reason, note + " false")
+                return True
+        return False
 
 class NishioForcingChain(ForcingChain):
 
@@ -265,13 +335,12 @@ class NishioForcingChain(ForcingChain):
     Construct the pair of digit forcing chains, one for each
     color, for each node and hint combination.
     """
-    def nishio(self, plan, i):
+    def nishio(self, plan, groups, alive, i):
         for node in plan.get_sudoku().get_incomplete():
             if not i in node.get_hints():
                 continue
-            chain = dict()
             origin = (((node, ), i), True)
-            self.forcing_chain_walk(origin, chain)
+            chain = self.forcing_chain_web(plan, origin, groups, alive)
             if self.nishio_process(plan, origin, chain):
                 return True
         return False
@@ -280,8 +349,11 @@ class NishioForcingChain(ForcingChain):
     Look for an process nishio forcing chain for all hints.
     """
     def run(self, plan):
+        sudoku = plan.get_sudoku()
+        groups = self.chain_group_table(sudoku)
+        alive = self.forcing_chain_alive(sudoku)
         for i in range(1, 10):
-            if self.nishio(plan, i):
+            if self.nishio(plan, groups, alive, i):
                 return True
         return False
 
@@ -414,16 +486,14 @@ class DigitForcingChain(ForcingChain):
     Construct the pair of digit forcing chains, one for each
     color, for each node and hint combination.
     """
-    def digit(self, plan, i):
+    def digit(self, plan, groups, alive, i):
         for node in plan.get_sudoku().get_incomplete():
             if not i in node.get_hints():
                 continue
             pair = []
             for color in [True, False]:
-                chain = dict()
                 origin = (((node, ), i), color)
-                self.forcing_chain_walk(origin, chain)
-                pair.append(chain)
+                pair.append(self.forcing_chain_web(plan, origin, groups, alive))
             if self.digit_process(plan, pair):
                 return True
         return False
@@ -432,7 +502,58 @@ class DigitForcingChain(ForcingChain):
     Look for an process digit forcing chain for all hints.
     """
     def run(self, plan):
+        sudoku = plan.get_sudoku()
+        groups = self.chain_group_table(sudoku)
+        alive = self.forcing_chain_alive(sudoku)
         for i in range(1, 10):
-            if self.digit(plan, i):
+            if self.digit(plan, groups, alive, i):
                 return True
         return False
+
+class CellForcingChain(ForcingChain):
+
+    __metaclass__ = StrategyMeta
+
+    def __init__(self):
+        ForcingChain.__init__(self, "CELL FORCING-CHAIN", False, 2)
+
+    """
+    One of the hints in a node must be true. Construct the forcing
+    chain from each hint in the node and look for the locations they
+    all lead to.
+    """
+    def run(self, plan):
+        sudoku = plan.get_sudoku()
+        groups = self.chain_group_table(sudoku)
+        alive = self.forcing_chain_alive(sudoku)
+        for node in sudoku.get_incomplete():
+            origins = [(((node, ), h), True) for h in node.get_hints()]
+            if self.forcing_chain_common(plan, origins, groups, alive, "cell"):
+                return True
+        return False
+
+class UnitForcingChain(ForcingChain):
+
+    __metaclass__ = StrategyMeta
+
+    def __init__(self):
+        ForcingChain.__init__(self, "UNIT FORCING-CHAIN", False, 2)
+
+    """
+    One of the nodes with a missing hint in a lot must take the hint.
+    Construct the forcing chain from the hint in each of the nodes and
+    look for the locations they all lead to.
+    """
+    def run(self, plan):
+        sudoku = plan.get_sudoku()
+        groups = self.chain_group_table(sudoku)
+        alive = self.forcing_chain_alive(sudoku)
+        for lot in sudoku.get_lots():
+            for i in lot.get_missing_values():
+                nodes = [x for x in lot.get_incomplete() if x.has_hint(i)]
+                origins = [(((x, ), i), True) for x in nodes]
+                if len(origins) < 2:
+                    continue
+                if self.forcing_chain_common(plan, origins, groups, alive, "unit"):
+                    return True
+        return False
@@ -0,0 +1,271 @@
+#
+# Implication based chain strategy module
+#
+
+from logger import *
+from playbook import *
+from sudoku import *
+from chain import *
+
+class Implication(Chain):
+
+    """
+    This class provides the base support for chaining on the closure of
+    implications rather than the walk of individual chains. Each of the
+    729 candidates, i.e., the hint in a node, is assigned a bit position
+    as follows.
+
+      index * 9 + hint - 1
+
+    where index is the position of the node on the board. A literal is
+    either a candidate being on or off. Literal c stands for candidate c
+    being on whereas literal c + 729 for it being off. Sets of literals
+    are therefore 1458-bit bitboards.
+
+    The implications between literals are the same as the links between
+    chain locations.
+
+      1) A on => B off if A and B are weakly linked, i.e., A and B are
+        the same hint in two related nodes, or two hints in the same node.
+      2) A off => B on if A and B are strongly linked, i.e., the only two
+        nodes with the hint in a lot, or the only two hints in a node.
+
+    The closure of a literal is the set of all literals reachable from it
+    through the implications, which is computed with integer operations
+    on bitboards breadth first. All chain eliminations can be read from
+    the closures without enumerating individual chains or loops. Chain
+    paths are only reconstructed to explain the eliminations taken, in
+    the form of chain locations.
+    """
+    def __init__(self, name):
+        Chain.__init__(self, name, False, 0)
+
+    """
+    Return the literal of the given chain location.
+    """
+    def implication_literal(self, loc):
+        ((node, ), hint), color = loc
+        c = node.get_index() * 9 + hint - 1
+        return c if color else c + 729
+
+    """
+    Return the chain location of the given literal.
+    """
+    def implication_loc(self, sudoku, x):
+        c = x % 729
+        return (((sudoku.get_node_at(c / 9), ), c % 9 + 1), x < 729)
+
+    """
+    Return the bitboard of candidates for the given hint in the nodes
+    of the given bitboard of nodes.
+    """
+    def implication_spread(self, mask, hint):
+        spread = 0
+        for x in Bitmask.indices(mask):
+            spread |= 1 << (x * 9 + hint - 1)
+        return spread
+
+    """
+    Return the implication graph of the Sudoku instance as a dict from
+    each literal to the bitboard of literals it directly implies. Only
+    the literals of the hints remaining are in the graph.
+    """
+    def implication_graph(self, sudoku):
+        graph = dict()
+        hmasks = dict((i, sudoku.get_hint_mask(i)) for i in range(1, 10))
+
+        # Strong links to the only other node with the hint in a lot are
+        # read from the conjugate pairs.
+        conjugates = dict()
+        for i in range(1, 10):
+            for lot, lmask in sudoku.get_conjugates(i):
+                a, b = [x * 9 + i - 1 for x in Bitmask.indices(lmask)]
+                conjugates[a] = conjugates.get(a, 0) | 1 << b
+                conjugates[b] = conjugates.get(b, 0) | 1 << a
+
+        for node in sudoku.get_incomplete():
+            index = node.get_index()
+            hints = node.get_hints()
+            cmask = 0
+            for hint in hints:
+                cmask |= 1 << (index * 9 + hint - 1)
+
+            for hint in hints:
+                c = index * 9 + hint - 1
+                peers = node.get_peer_mask() & hmasks[hint]
+
+                # Weak links to the same hint in related nodes and to the
+                # other hints in the same node.
+                graph[c] = (self.implication_spread(peers, hint) | cmask & ~(1 << c)) << 729
+
+                # Strong links to the conjugates and to the only other
+                # hint in the node.
+                strong = conjugates.get(c, 0)
+                if len(hints) == 2:
+                    strong |= cmask & ~(1 << c)
+                graph[c + 729] = strong
+
+        return graph
+
+    """
+    Return the closure of the given literal, including the literal
+    itself.
+    """
+    def implication_closure(self, graph, x):
+        closure = 1 << x
+        frontier = closure
+        while frontier:
+            reach = 0
+            for y in Bitmask.indices(frontier):
+                reach |= graph[y]
+            frontier = reach & ~closure
+            closure |= frontier
+        return closure
+
+    """
+    Return the constraints of the Sudoku instance as a list of bitboards
+    of the off literals, one for each incomplete node and one for each
+    hint missing in a lot. Not all literals in a constraint may be set
+    in a closure since at least one of the candidates must be on.
+    """
+    def implication_constraints(self, sudoku):
+        constraints = []
+        for node in sudoku.get_incomplete():
+            mask = 0
+            for hint in node.get_hints():
+                mask |= 1 << (node.get_index() * 9 + hint - 1)
+            constraints.append(mask << 729)
+        for i in range(1, 10):
+            hmask = sudoku.get_hint_mask(i)
+            for lot in sudoku.get_lots():
+                mask = lot.get_mask() & hmask
+                if mask and not lot.has_value(i):
+                    constraints.append(self.implication_spread(mask, i) << 729)
+        return constraints
+
+    """
+    Return the literals in the closure that contradict each other or
+    None if the closure is consistent. A closure is in contradiction if
+    it has the same candidate both on and off, or all candidates in a
+    node or for a hint in a lot off.
+    """
+    def implication_conflict(self, closure, constraints):
+        both = closure & (closure >> 729) & ((1 << 729) - 1)
+        if both:
+            c = Bitmask.first(both)
+            return [c, c + 729]
+        for mask in constraints:
+            if closure & mask == mask:
+                return list(Bitmask.indices(mask))
+        return None
+
+    """
+    Return the chain of locations leading from the literal x to the
+    literal y in the implication graph, which is the shortest one found
+    breadth first.
+    """
+    def implication_path(self, sudoku, graph, x, y):
+        back = {x: None}
+        frontier = [x]
+        while not y in back:
+            reach = []
+            for z in frontier:
+                for w in Bitmask.indices(graph[z]):
+                    if not w in back:
+                        back[w] = z
+                        reach.append(w)
+            frontier = reach
+        path = []
+        while not y is None:
+            path.insert(0, self.implication_loc(sudoku, y))
+            y = back[y]
+        return path
+
+    """
+    Return the information regarding the chains between each of the
+    given pairs of literals.
+    """
+    def implication_info(self, sudoku, graph, pairs):
+        paths = [self.implication_path(sudoku, graph, x, y) for x, y in pairs]
+        return {
+            "chain": [self.chain_format(path, False) for path in paths],
+            "__chain__": paths,
+            }
+
+class ImplicationChain(Implication):
+
+    __metaclass__ = StrategyMeta
+
+    """
+    IMPLICATION-CHAIN reads the eliminations of nice loops and forcing
+    chains from the closures of the on and off literals of each hint
+    remaining, without the groups.
+
+      1) If the hint being on leads to a contradiction, which includes
+        the discontiguous weak nice loop and the contiguous nice loops
+        that see the hint at both ends, the hint can be eliminated.
+      2) If the hint being off leads to a contradiction, which includes
+        the discontiguous strong nice loop, the hint is the value.
+      3) If a literal is implied by both the hint being on and off, as
+        in digit forcing chains, the literal holds regardless.
+
+    All eliminations found from the same set of closures are processed,
+    since the implications stay true as the hints are removed.
+    """
+    def __init__(self):
+        Implication.__init__(self, "IMPLICATION-CHAIN")
+
+    """
+    Process the closures of the on and off literals of the hint in the
+    node.
+    """
+    def implication_process(self, plan, graph, constraints, node, hint):
+        sudoku = plan.get_sudoku()
+        hints = set([hint])
+        c = node.get_index() * 9 + hint - 1
+
+        on = self.implication_closure(graph, c)
+        conflict = self.implication_conflict(on, constraints)
+        if conflict:
+            reason = self.implication_info(sudoku, graph, [(c, x) for x in conflict])
+            return self.purge_hints(plan, [node], hints, reason, "on conflict")
+
+        off = self.implication_closure(graph, c + 729)
+        conflict = self.implication_conflict(off, constraints)
+        if conflict:
+            reason = self.implication_info(sudoku, graph, [(c + 729, x) for x in conflict])
+            return self.update_hints(plan, [node], hints, reason, "off conflict")
+
+        status = False
+        for x in Bitmask.indices(on & off):
+            loc = self.implication_loc(sudoku, x)
+            ((n, ), h), color = loc
+            if n.is_complete() or not h in n.get_hints():
+                continue
+            reason = self.implication_info(sudoku, graph, [(c, x), (c + 729, x)])
+            if color:
+                if self.update_hints(plan, [n], set([h]), reason, "both true"):
+                    status = True
+            elif self.purge_hints(plan, [n], set([h]), reason, "both false"):
+                status = True
+        return status
+
+    """
+    Compute the implication graph once and process the closures of
+    all hints remaining.
+    """
+    def run(self, plan):
+        status = False
+        sudoku = plan.get_sudoku()
+        graph = self.implication_graph(sudoku)
+        constraints = self.implication_constraints(sudoku)
+        for node in sudoku.get_incomplete():
+            # In case nodes have been updated...
+            if node.is_complete():
+                continue
+            for hint in node.get_hints():
+                if not node.has_hint(hint):
+                    continue
+                if self.implication_process(plan, graph, constraints, node, hint):
+                    status = True
+        return status
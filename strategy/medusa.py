@@ -2,7 +2,6 @@
 # Medusa based strategy module
 #
 
-import itertools
 from logger import *
 from playbook import *
 from sudoku import *
@@ -14,43 +13,51 @@ class MedusaBase(Strategy):
         self.simple = simple
 
     """
-    Return the set of links in the graph optionally conditioned upon
-    hint and color matching. Each link takes the form of a 2-tuple
-    with node and hint.
+    Return the bitboards of the 3D-MEDUSA graph, which map each 2-tuple
+    of hint and color to the bitboard of the Sudoku nodes in the graph
+    with the hint in that color. The color rules run on these instead
+    of the graph itself.
     """
-    def medusa_all_links(self, graph, hint = None, color = None):
-        return set([l for l, c in graph.keys()
-                    if (hint is None or l[1] == hint) and
-                    (color is None or c == color)])
+    def medusa_masks(self, graph):
+        masks = dict()
+        for (node, hint), color in graph.keys():
+            masks[(hint, color)] = masks.get((hint, color), 0) | node.get_mask()
+        return masks
 
     """
-    Return True if the link is in the graph.
+    Return the bitboard of all Sudoku nodes in the 3D-MEDUSA graph
+    optionally conditioned upon hint and color matching.
     """
-    def medusa_has_link(self, graph, link):
-        for color in [True, False]:
-            if (link, color) in graph:
-                return True
-        return False
-
-    """
-    Return the set of all Sudoku nodes in the 3D-MEDUSA graph.
-    """
-    def medusa_all_nodes(self, graph, hint = None, color = None):
-        return set([n for n, h in self.medusa_all_links(graph, hint, color)])
+    def medusa_all_nodes(self, masks, hint = None, color = None):
+        mask = 0
+        for (h, c), x in masks.items():
+            if (hint is None or h == hint) and (color is None or c == color):
+                mask |= x
+        return mask
 
     """
     Return the set of all hints in the 3D-MEDUSA graph. For simple
     coloring, there will be one and only.
     """
-    def medusa_all_hints(self, graph, color = None):
-        return set([h for n, h in self.medusa_all_links(graph, None, color)])
+    def medusa_all_hints(self, masks):
+        return set([h for h, c in masks.keys()])
 
     """
     Return the set of hints in the 3D-MEDUSA graph in the given
     node and with the given color.
     """
-    def medusa_node_hints(self, graph, node, color = None):
-        return set([h for x, h in self.medusa_all_links(graph, None, color) if x == node])
+    def medusa_node_hints(self, masks, node, color):
+        bit = node.get_mask()
+        return set([h for (h, c), x in masks.items() if c == color and x & bit])
+
+    """
+    Return the bitboard of the incomplete nodes among the given ones.
+    """
+    def medusa_incomplete(self, sudoku, mask):
+        for node in sudoku.mask_nodes(mask):
+            if node.is_complete():
+                mask &= ~node.get_mask()
+        return mask
 
     """
     Return the raw "chain" as a list of locations and the connected
@@ -80,78 +87,93 @@ class MedusaBase(Strategy):
     This should always return True since a 3D-MEDUSA graph should
     have hints of both colors.
     """
-    def medusa_purge_color(self, plan, graph, color, reason, note):
+    def medusa_purge_color(self, plan, masks, color, reason, note):
         status = False
-        for node in self.medusa_all_nodes(graph):
-            hints = self.medusa_node_hints(graph, node, color)
+        sudoku = plan.get_sudoku()
+        for node in sudoku.mask_nodes(self.medusa_all_nodes(masks)):
+            hints = self.medusa_node_hints(masks, node, color)
             if self.purge_hints(plan, [node], hints, reason, note):
                 status = True
         return status
 
     """
     If two hints in a node have the same color, all hints of that
-    color can be removed from the graph.
+    color can be removed from the graph. The nodes are found as the
+    overlap of the bitboards of different hints in the same color.
     """
-    def medusa_conflict_node(self, plan, graph, reason):
-        for node in self.medusa_all_nodes(graph):
-            if node.is_complete():
-                continue
-            for color in [True, False]:
-                hints = self.medusa_node_hints(graph, node, color)
-                if len(hints) > 1:
-                    note = "hints {0} have color {1} in {2}".format(
-                        sorted(hints), color, node)
-                    return self.medusa_purge_color(plan, graph, color, reason, note)
+    def medusa_conflict_node(self, plan, masks, reason):
+        sudoku = plan.get_sudoku()
+        for color in [True, False]:
+            seen, dups = 0, 0
+            for hint in self.medusa_all_hints(masks):
+                mask = masks.get((hint, color), 0)
+                dups |= seen & mask
+                seen |= mask
+            dups = self.medusa_incomplete(sudoku, dups)
+            if dups:
+                node = sudoku.get_node_at(Bitmask.first(dups))
+                hints = self.medusa_node_hints(masks, node, color)
+                note = "hints {0} have color {1} in {2}".format(
+                    sorted(hints), color, node)
+                return self.medusa_purge_color(plan, masks, color, reason, note)
         return False
 
     """
     It the same hint appears twice in the same color in the same lot,
     all hints of that color can be removed from the graph.
     """
-    def medusa_conflict_lot(self, plan, graph, reason):
-        nodes = self.medusa_all_nodes(graph)
-        for lot in plan.get_sudoku().get_lots():
-            lnodes = nodes & set(lot.get_nodes())
+    def medusa_conflict_lot(self, plan, masks, reason):
+        sudoku = plan.get_sudoku()
+        incomplete = self.medusa_incomplete(sudoku, self.medusa_all_nodes(masks))
+        for lot in sudoku.get_lots():
+            lmask = lot.get_mask() & incomplete
             for color in [True, False]:
-                conflicts = set()
-                candidates = [self.medusa_node_hints(graph, node, color) for node in lnodes
-                              if not node.is_complete()]
-                for pair in itertools.combinations(candidates, 2):
-                    conflicts |= pair[0] & pair[1]
+                conflicts = set([h for (h, c), x in masks.items()
+                                 if c == color and Bitmask.count(x & lmask) > 1])
                 if conflicts:
                     note = "hints {0} have color {1} in {2}".format(
                         sorted(conflicts), color, lot)
-                    return self.medusa_purge_color(plan, graph, color, reason, note)
+                    return self.medusa_purge_color(plan, masks, color, reason, note)
         return False
 
     """
     Check if a node in the 3D-MEDUSA graph has two conflicting colors.
     """
-    def medusa_bicolor_node(self, plan, graph, reason):
+    def medusa_bicolor_node(self, plan, masks, reason):
         status = False
-        for node in self.medusa_all_nodes(graph):
+        sudoku = plan.get_sudoku()
+        mask = self.medusa_all_nodes(masks, None, True) & self.medusa_all_nodes(masks, None, False)
+        for node in sudoku.mask_nodes(mask):
             if node.is_complete():
                 continue
-            on = self.medusa_node_hints(graph, node, True)
-            off = self.medusa_node_hints(graph, node, False)
-            if not on or not off:
-                continue
-            hints = on | off
+            hints = self.medusa_node_hints(masks, node, True)
+            hints |= self.medusa_node_hints(masks, node, False)
             if self.test_update([node], hints):
                 self.update_hints(plan, [node], hints, reason, "dual-color node")
                 status = True
         return status
 
+    """
+    Return the bitboard of the nodes visible to any of the given nodes
+    except the nodes themselves.
+    """
+    def medusa_related(self, sudoku, mask):
+        related = 0
+        for node in sudoku.mask_nodes(mask):
+            related |= node.get_peer_mask()
+        return related & ~mask
+
     """
     Check if a node outside of the 3D-MEDUSA graph can simultaneously
     "see" nodes of conflicting colors.
     """
-    def medusa_conflict_offchain(self, plan, graph, reason):
+    def medusa_conflict_offchain(self, plan, masks, reason):
         status = False
-        for hint in self.medusa_all_hints(graph):
-            on = self.find_related(self.medusa_all_nodes(graph, hint, True))
-            off = self.find_related(self.medusa_all_nodes(graph, hint, False))
-            intersect = on & off
+        sudoku = plan.get_sudoku()
+        for hint in self.medusa_all_hints(masks):
+            on = self.medusa_related(sudoku, masks.get((hint, True), 0))
+            off = self.medusa_related(sudoku, masks.get((hint, False), 0))
+            intersect = sudoku.mask_nodes(on & off)
             hints = set([hint])
             if self.test_purge(intersect, hints):
                 self.purge_hints(plan, intersect, hints, reason, "off-chain color conflict")
@@ -163,24 +185,23 @@ class MedusaBase(Strategy):
     the lot, and any hint exists in the same node with opposite color,
     we can remove the uncolored hint.
     """
-    def medusa_node_lot(self, plan, graph, reason):
+    def medusa_node_lot(self, plan, masks, reason):
         status = False
+        sudoku = plan.get_sudoku()
 
-        nodes = self.medusa_all_nodes(graph)
-        for node in nodes:
+        for node in sudoku.mask_nodes(self.medusa_all_nodes(masks)):
             if node.is_complete():
                 continue
             hints = node.get_hints()
+            colors = [color for color in [True, False]
+                      if self.medusa_node_hints(masks, node, color)]
             for color in [True, False]:
-                hints -= self.medusa_node_hints(graph, node, color)
-            area = node.find_related()
+                hints -= self.medusa_node_hints(masks, node, color)
+            area = node.get_peer_mask()
             conflicts = set()
             for hint in hints:
-                for color in [True, False]:
-                    if not self.medusa_node_hints(graph, node, color):
-                        continue
-                    intersect = area & self.medusa_all_nodes(graph, hint, not color)
-                    if intersect:
+                for color in colors:
+                    if area & masks.get((hint, not color), 0):
                         conflicts.add(hint)
             if self.test_purge([node], conflicts):
                 self.purge_hints(plan, [node], conflicts, reason, "node lot conflict")
@@ -192,19 +213,17 @@ class MedusaBase(Strategy):
     Check if a node outside of the 3D-MEDUSA graph is emptied by
     nodes of the same color.
     """
-    def medusa_empty_color(self, plan, graph, reason):
-        nodes = set(plan.get_sudoku().get_incomplete()) - self.medusa_all_nodes(graph)
-        for node in nodes:
+    def medusa_empty_color(self, plan, masks, reason):
+        sudoku = plan.get_sudoku()
+        nodes = self.medusa_all_nodes(masks)
+        for node in sudoku.get_incomplete():
+            if node.get_mask() & nodes:
+                continue
+            area = node.get_peer_mask()
             for color in [True, False]:
-                status = True
-                for hint in node.get_hints():
-                    intersect = self.medusa_all_nodes(graph, hint, color) & node.find_related()
-                    if not intersect:
-                        status = False
-                        break
-                if status:
+                if all([area & masks.get((hint, color), 0) for hint in node.get_hints()]):
                     note = "{0} emptied by color {1}".format(node, color)
-                    return self.medusa_purge_color(plan, graph, color, reason, note)
+                    return self.medusa_purge_color(plan, masks, color, reason, note)
         return False
 
     """
@@ -213,79 +232,66 @@ class MedusaBase(Strategy):
     def medusa_process(self, plan, graph):
         reason = {"chain": self.medusa_format(graph),
                   "__chain__": self.medusa_chain(graph)}
+        masks = self.medusa_masks(graph)
 
         status = False
 
-        if not self.simple and self.medusa_conflict_node(plan, graph, reason):
+        if not self.simple and self.medusa_conflict_node(plan, masks, reason):
             status = True
-        if self.medusa_conflict_lot(plan, graph, reason):
+        if self.medusa_conflict_lot(plan, masks, reason):
             status = True
-        if not self.simple and self.medusa_bicolor_node(plan, graph, reason):
+        if not self.simple and self.medusa_bicolor_node(plan, masks, reason):
             status = True
-        if self.medusa_conflict_offchain(plan, graph, reason):
+        if self.medusa_conflict_offchain(plan, masks, reason):
             status = True
-        if self.medusa_node_lot(plan, graph, reason):
+        if self.medusa_node_lot(plan, masks, reason):
             status = True
-        if not self.simple and self.medusa_empty_color(plan, graph, reason):
+        if not self.simple and self.medusa_empty_color(plan, masks, reason):
             status = True
 
         return status
 
     """
-    Return all exclusive links emanating from the given link.
+    Return all exclusive links, or strong links, among the given hints
+    as 2-tuples of links. A link in turn is a 2-tuple of Sudoku node and
+    hint. Two links are exclusive if they are the only two nodes with
+    the hint in a lot, or for 3D-MEDUSA, the only two hints in a node.
     """
-    def medusa_find_links(self, link):
-        node, hint = link
+    def medusa_find_links(self, sudoku, hints):
+        links = []
+        for hint in hints:
+            for lot, lmask in sudoku.get_conjugates(hint):
+                a, b = sudoku.mask_nodes(lmask)
+                links.append(((a, hint), (b, hint)))
 
-        # Look for exclusive links in each lot.
-        nodes = [lot.exclusive_link(node, hint) for lot in node.get_lots()]
-        nodes = set([n for n in nodes if n])
-        links = set([(n, hint) for n in nodes])
-
-        # Look for exclusive link in the node.
         if not self.simple:
-            diff = node.get_hints() - set([hint])
-            if len(diff) == 1:
-                sibling = diff.pop()
-                links.add((node, sibling))
+            for node in sudoku.get_incomplete():
+                pair = sorted(node.get_hints())
+                if len(pair) == 2:
+                    links.append(((node, pair[0]), (node, pair[1])))
 
         return links
 
     """
-    Add the next location to the graph and return True if it didn't
-    exist in the graph before. Meanwhile, make a connection from the
-    current location to the next if and only if we didn't come from
-    there.
+    Find the root of the given link in the union-find forest together
+    with the parity of the link relative to the root. The path to the
+    root is compressed along the way.
     """
-    def medusa_add(self, graph, next, loc = None):
-        status = not next in graph
-        if status:
-            graph[next] = []
-        if loc and not loc in graph[next]:
-            graph[loc].append(next)
-        return status
-
-    """
-    Recursive 3D-MEDUSA graph walk. It takes the partially constructed
-    graph and a location in the graph and enters all edges emanating
-    from that location into the graph. It calls itself if there are any
-    new location to be explored. Otherwise, the recursion terminates.
-    """
-    def medusa_walk(self, loc, graph):
-        link, color = loc
-
-        # Add the origin to the graph.
-        if not graph:
-            self.medusa_add(graph, loc)
-
-        locs = []
-        links = self.medusa_find_links(link)
-        for next in [(l, not color) for l in links]:
-            if self.medusa_add(graph, next, loc):
-                locs.append(next)
-
-        for next in locs:
-            self.medusa_walk(next, graph)
+    def medusa_find(self, forest, link):
+        path = []
+        parity = False
+        while forest[link][0] != link:
+            path.append(link)
+            parity ^= forest[link][1]
+            link = forest[link][0]
+        root, total = link, parity
+        # Compress the path. The parity of each link on the path relative
+        # to the root is peeled off the total on the way down.
+        for x in path:
+            p = forest[x][1]
+            forest[x] = (root, parity)
+            parity ^= p
+        return root, total
 
     """
     Each 3D-MEDUSA instance is a graph. The node in the graph, referred
@@ -297,43 +303,56 @@ class MedusaBase(Strategy):
     always alternates between any pair of connected links. We use a dict
     to represent the 3D-MEDUSA graph.
     
-    The 3D-MEDUSA instance is an undirected, fully reachable, and possibly
-    cyclic graph. That implies we will eventually cover the entire graph
-    regardless where we start.
-
     A Sudoku instance may have multiple 3D-MEDUSA instances, each of which
-    is represented by a separate graph.
-    """
-    def medusa(self, plan, i):
-        graphs = []
-        for node in plan.get_sudoku().get_incomplete():
-            if not i in node.get_hints():
-                continue
-            # Skip if the link is part of an already discovered graph.
-            # Note that the link color doesn't really matter for this
-            # test due to the full reachability of the graph.
-            link = (node, i)
-            if any([self.medusa_has_link(x, link) for x in graphs]):
-                continue
-            graph = dict()
-            self.medusa_walk((link, True), graph)
-            if len(graph) > 1:
-                graphs.append(graph)
-        
+    is represented by a separate graph. All of them are built in a single
+    pass over the strong links with union-find, where each link records
+    its parent together with the parity of its color relative to the
+    parent. The color of a link is then the parity relative to the root
+    of its graph.
+    """
+    def medusa(self, plan, hints):
+        links = self.medusa_find_links(plan.get_sudoku(), hints)
+
+        forest = dict()
+        for a, b in links:
+            for link in [a, b]:
+                if not link in forest:
+                    forest[link] = (link, False)
+            ra, pa = self.medusa_find(forest, a)
+            rb, pb = self.medusa_find(forest, b)
+            # Strong links always connect links of opposite colors.
+            if ra != rb:
+                forest[rb] = (ra, not pa ^ pb)
+
+        graphs = dict()
+        colors = dict()
+        for link in forest.keys():
+            root, parity = self.medusa_find(forest, link)
+            colors[link] = not parity
+            graphs.setdefault(root, dict())[(link, not parity)] = []
+        for a, b in links:
+            graph = graphs[self.medusa_find(forest, a)[0]]
+            loc, next = (a, colors[a]), (b, colors[b])
+            if not next in graph[loc]:
+                graph[loc].append(next)
+
         status = False
-        for graph in graphs:
+        for graph in graphs.values():
             if self.medusa_process(plan, graph):
                 status = True
         return status
 
     """
     3D-MEDUSA strategy. Simple coloring, or single's chain, as a special
-    case of 3D-MEDUSA, is covered here as well.
+    case of 3D-MEDUSA, is covered here as well. Simple coloring works on
+    one hint at a time, while 3D-MEDUSA graphs span all hints.
     """
     def run(self, plan):
+        if not self.simple:
+            return self.medusa(plan, range(1, 10))
         status = False
         for i in range(1, 10):
-            if self.medusa(plan, i):
+            if self.medusa(plan, [i]):
                 status = True
         return status
 
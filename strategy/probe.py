@@ -0,0 +1,85 @@
+#
+# Failed literal probing strategy module
+#
+
+from logger import *
+from playbook import *
+from sudoku import *
+from backtrack import *
+
+class Probe(Strategy):
+
+    __metaclass__ = StrategyMeta
+
+    """
+    PROBE assumes each hint in turn to be the value of its node and
+    propagates naked and hidden singles from there with the engine, see
+    Backtrack. A hint that leads to a contradiction is eliminated, much
+    like NISHIO FORCING-CHAIN but without building the chains.
+
+    The singles each probe establishes are kept in a table. Once a hint
+    is eliminated, so is every hint probed earlier that implies it, by
+    contraposition, without probing again. Hints eliminated are also
+    ruled out of the engine, so that later probes build upon them.
+    """
+    def __init__(self):
+        Strategy.__init__(self, "PROBE")
+
+    """
+    Return the guesses, as 2-tuples of node index and hint, taken by the
+    given candidates propagated but not by the engine.
+    """
+    def probe_implied(self, engine, cands):
+        return [(x, Backtrack.value(c)) for x, c in enumerate(cands)
+                if not c & (c - 1) and engine.cands[x] & (engine.cands[x] - 1)]
+
+    """
+    Probe all hints. Return a list of 2-tuples of each guess that fails
+    and the guesses it implies that failed before, if any.
+    """
+    def probe(self, engine, guesses):
+        implied = dict()
+        failed = []
+        for guess in guesses:
+            x, hint = guess
+            if not engine.cands[x] & 1 << (hint - 1):
+                continue
+            cands = engine.test([guess])
+            if not cands is None:
+                for y in self.probe_implied(engine, cands):
+                    implied.setdefault(y, []).append(guess)
+                continue
+
+            pending = [(guess, [])]
+            while pending:
+                guess, via = pending.pop()
+                x, hint = guess
+                if not engine.cands[x] & 1 << (hint - 1):
+                    continue
+                engine.cands[x] &= ~(1 << (hint - 1))
+                failed.append((guess, via))
+                for y in implied.pop(guess, []):
+                    pending.append((y, [guess]))
+        return failed
+
+    """
+    PROBE strategy.
+    """
+    def run(self, plan):
+        sudoku = plan.get_sudoku()
+        nodes = sudoku.get_incomplete()
+        engine = Backtrack(sudoku)
+        guesses = [(x.get_index(), h) for x in nodes for h in sorted(x.get_hints())]
+        status = False
+        for (x, hint), via in self.probe(engine, guesses):
+            node = sudoku.get_node_at(x)
+            if node.is_complete() or not node.has_hint(hint):
+                continue
+            reason = {
+                "hint": hint,
+                "probe": node,
+                "via": [(sudoku.get_node_at(y), h) for y, h in via]
+                }
+            self.purge_hints(plan, [node], set([hint]), reason)
+            status = True
+        return status
@@ -2,37 +2,222 @@
 # Trial based strategy module
 #
 
+import itertools
+import multiprocessing
 from logger import *
 from playbook import *
 from sudoku import *
+from backtrack import *
+from cdcl import *
+
+"""
+Return the state for evaluating first guesses, made of the engine set
+up from the given candidates, the dict from the index of each
+incomplete node to its hints, the number of guesses that follow the
+first one, and the tables below. Single guesses are remembered once
+tested on their own, so that any combination containing one that leads
+to a contradiction is known to be invalid without testing. The table
+may be given prefilled. Pairs of guesses are also memoized regardless
+of their order, so that each is tested once.
+"""
+def trial_setup(cands, hints, depth, dead = None):
+    memo = dict() if depth == 1 else None
+    return (Backtrack(None, cands), hints, depth, dict(dead or {}), memo)
+
+"""
+Evaluate the given first guess, as a 2-tuple of node index and hint,
+followed by all combinations of further guesses on the other nodes.
+Return a 2-tuple of status and solution, where status is "solved"
+together with the solution as a list of values, "invalid" if every
+combination leads to a contradiction, or None otherwise.
+"""
+def trial_evaluate(state, first):
+    engine, others, depth, dead, memo = state
+    if trial_dead(engine, first, dead):
+        return ("invalid", None)
+
+    invalid = True
+    indices = sorted([x for x in others.keys() if x != first[0]])
+    for nodes in itertools.combinations(indices, depth):
+        for hints in itertools.product(*[others[x] for x in nodes]):
+            guesses = [first] + zip(nodes, hints)
+            if any([trial_dead(engine, x, dead) for x in guesses[1:]]):
+                continue
+            result = trial_test(engine, guesses, memo)
+            if result is None:
+                continue
+            if result is not True:
+                return ("solved", [Backtrack.value(x) for x in result])
+            invalid = False
+
+    if invalid:
+        # The first guess is as good as a contradiction on its own.
+        dead[first] = True
+        return ("invalid", None)
+    return (None, None)
+
+"""
+Return True if the given single guess leads to a contradiction on its
+own, testing it with the engine only the first time.
+"""
+def trial_dead(engine, guess, dead):
+    if not guess in dead:
+        dead[guess] = engine.test([guess]) is None
+    return dead[guess]
+
+"""
+Test the given guesses with the engine, looking up and recording the
+outcome in the memo if given. Return None on contradiction, the
+candidates if solved, or True otherwise.
+"""
+def trial_test(engine, guesses, memo):
+    key = frozenset(guesses)
+    if not memo is None and key in memo:
+        return memo[key]
+    result = engine.test(guesses)
+    if not result is None and not Backtrack.solved(result):
+        result = True
+    if not memo is None:
+        memo[key] = result
+    return result
+
+"""
+The setup and the state last built from it in a worker process, so
+that chunks of first guesses of the same run share the tables.
+"""
+trial_shared = None
+
+"""
+Evaluate a chunk of first guesses in a worker process. The task is a
+2-tuple of the arguments to trial_setup() and the list of first
+guesses. Return the list of results. This is a plain function so that
+it can be shipped to worker processes.
+"""
+def trial_work(task):
+    global trial_shared
+    setup, firsts = task
+    if trial_shared is None or trial_shared[0] != setup:
+        trial_shared = (setup, trial_setup(*setup))
+    return [trial_evaluate(trial_shared[1], x) for x in firsts]
 
 class Trial(Strategy):
 
-    def __init__(self, name):
-        Strategy.__init__(self, name)
+    """
+    Trial based strategies take guesses and test them with the
+    backtracking engine, see Backtrack, rather than running a full
+    plan on a snapshot of the board for each guess.
 
-    def try_hints(self, plan, hints):
-        sudoku = plan.get_sudoku()
-        trial = sudoku.snap()
+    For multiple guesses, each first guess together with all further
+    guesses on the other nodes is an independent task. First guesses on
+    bi-value nodes come first as they are the quickest to eliminate. A
+    single guess found invalid, on its own or as a first guess, prunes
+    every combination containing it, and pairs are only tested once
+    whatever their order.
+
+    The tasks are evaluated in this process unless the number of worker
+    processes is set, e.g., by Playbook.catalog["TRIAL-2"].processes,
+    in which case they are spread over a pool of processes kept for the
+    lifetime of the plan. All single guesses are then tested upfront in
+    this process and shipped along, so that every worker prunes with
+    them, while the pairs are only memoized per worker.
+    """
+    def __init__(self, name, depth = 0):
+        Strategy.__init__(self, name)
+        self.depth = depth
+        self.processes = None
 
-        # Take a leap of faith with the given hints and then run deduction
+    """
+    Take a leap of faith with the given hints, as 2-tuples of node and
+    hint, and propagate them with the engine. Raise LogicException if
+    they lead to a contradiction. Take the solution and return True if
+    the board is solved; otherwise, return False.
+    """
+    def try_hints(self, plan, engine, hints):
         self.debug(2, "hints {0}".format(hints))
 
-        for hint in hints:
-            node, value = hint
-            copy = trial.get_node(node.get_row().get_ident(), node.get_col().get_ident())
-            copy.set_value(value)
+        cands = engine.test([(x.get_index(), h) for x, h in hints])
+        if cands is None:
+            raise LogicException(hints)
+        if not Backtrack.solved(cands):
+            return False
+
+        solution = [Backtrack.value(x) for x in cands]
+        return self.trial_apply(plan, solution, {"hints": hints})
 
-        # Disable high level strategies for trial runs.
-        options = plan.get_options().copy()
-        for strategy in Playbook.all_strategies():
-            if options.get_level(strategy) > 1:
-                options.disable(strategy)
+    """
+    Update the incomplete nodes with the given solution, a list of 81
+    values in the order of node indices.
+    """
+    def trial_apply(self, plan, solution, reason):
+        for node in plan.get_sudoku().get_incomplete():
+            self.update_hints(plan, [node], set([solution[node.get_index()]]), reason)
+        return True
+
+    """
+    Return the pool of worker processes of the plan, which is created on
+    first use and terminated once the plan is carried out.
+    """
+    def trial_pool(self, plan):
+        pools = plan.get_cache("POOL")
+        if not self.processes in pools:
+            pools[self.processes] = multiprocessing.Pool(self.processes)
+        return pools[self.processes]
+
+    """
+    Evaluate the first guesses with trial_evaluate() on the Sudoku
+    instance and yield the results in order, either in this process or
+    in the pool of worker processes. In the latter case, the guesses are
+    dispatched in chunks, one round of chunks at a time, so that little
+    work is wasted once the caller stops consuming the results.
+    """
+    def trial_map(self, plan, guesses):
+        sudoku = plan.get_sudoku()
+        hints = dict((x.get_index(), sorted(x.get_hints())) for x in sudoku.get_incomplete())
+        setup = (Backtrack(sudoku).cands, hints, self.depth)
+        firsts = [(node.get_index(), hint) for node, hint in guesses]
 
-        if Playbook.solve(trial, options, True):
-            sudoku.copy(trial)
-            return True
+        if not self.processes:
+            state = trial_setup(*setup)
+            for first in firsts:
+                yield trial_evaluate(state, first)
+            return
 
+        state = trial_setup(*setup)
+        for first in firsts:
+            trial_dead(state[0], first, state[3])
+        setup = setup + (state[3], )
+
+        pool = self.trial_pool(plan)
+        size = max(1, len(firsts) / (self.processes * 4))
+        chunks = [(setup, firsts[i:i + size]) for i in range(0, len(firsts), size)]
+        for i in range(0, len(chunks), self.processes):
+            for results in pool.map(trial_work, chunks[i:i + self.processes]):
+                for x in results:
+                    yield x
+
+    """
+    Evaluate all first guesses with the given number of further guesses
+    each. Take the solution of the first guess that solves the board.
+    Eliminate the hint of each first guess that is invalid whatever the
+    further guesses.
+    """
+    def trial_multiple(self, plan):
+        sudoku = plan.get_sudoku()
+        nodes = sorted(sudoku.get_incomplete(), key = lambda x: len(x.get_hints()))
+        guesses = [(x, h) for x in nodes for h in sorted(x.get_hints())]
+        results = self.trial_map(plan, guesses)
+        try:
+            for (node, hint), (status, solution) in itertools.izip(guesses, results):
+                if node.is_complete():
+                    continue
+                if status == "solved":
+                    return self.trial_apply(plan, solution, {"hints": (node, hint)})
+                if status == "invalid":
+                    self.purge_hints(plan, [node], set([hint]))
+                    if node.is_complete():
+                        return True
+        finally:
+            results.close()
         return False
 
 class TrialOne(Trial):
@@ -56,17 +241,19 @@ class TrialOne(Trial):
     """
     def run(self, plan):
         sudoku = plan.get_sudoku()
+        engine = Backtrack(sudoku)
         for node in sudoku.get_incomplete():
             for hint in node.get_hints():
                 hints = ((node, hint), )
                 try:
-                    if self.try_hints(plan, hints):
+                    if self.try_hints(plan, engine, hints):
                         return True
                 except LogicException:
                     # Wrong guess. Eliminate the hint.
                     self.purge_hints(plan, [node], set([hint]))
                     if node.is_complete():
                         return True
+                    engine = Backtrack(sudoku)
         return False
 
 class TrialTwo(Trial):
@@ -74,7 +261,7 @@ class TrialTwo(Trial):
     __metaclass__ = StrategyMeta
 
     def __init__(self):
-        Trial.__init__(self, "TRIAL-2")
+        Trial.__init__(self, "TRIAL-2", 1)
 
     """
     Similar to TrialOne except we make two guesses on different nodes.
@@ -83,33 +270,14 @@ class TrialTwo(Trial):
     require this strategy.
     """
     def run(self, plan):
-        sudoku = plan.get_sudoku()
-        for node in sudoku.get_incomplete():
-            for hint in node.get_hints():
-                invalid = True
-                for node2 in sudoku.get_incomplete():
-                    if node2 == node:
-                        continue
-                    for hint2 in node2.get_hints():
-                        hints = ((node, hint), (node2, hint2))
-                        try:
-                            if self.try_hints(plan, hints):
-                                return True
-                            invalid = False
-                        except LogicException:
-                            continue
-                if invalid:
-                    self.purge_hints(plan, [node], set([hint]))
-                    if node.is_complete():
-                        return True
-        return False
+        return self.trial_multiple(plan)
 
 class TrialThree(Trial):
 
     __metaclass__ = StrategyMeta
 
     def __init__(self):
-        Trial.__init__(self, "TRIAL-3")
+        Trial.__init__(self, "TRIAL-3", 2)
 
     """
     Similar to TrialOne except the search now include three guesses.
@@ -117,27 +285,53 @@ class TrialThree(Trial):
     to require this strategy.
     """
     def run(self, plan):
-        sudoku = plan.get_sudoku()
-        for node in sudoku.get_incomplete():
-            for hint in node.get_hints():
-                invalid = True
-                for node2 in sudoku.get_incomplete():
-                    if node2 == node:
-                        continue
-                    for hint2 in node2.get_hints():
-                        for node3 in sudoku.get_incomplete():
-                            if node3 == node or node3 == node2:
-                                continue
-                            for hint3 in node3.get_hints():
-                                hints = ((node, hint), (node2, hint2), (node3, hint3))
-                                try:
-                                    if self.try_hints(plan, hints):
-                                        return True
-                                    invalid = False
-                                except LogicException:
-                                    continue
-                if invalid:
-                    self.purge_hints(plan, [node], set([hint]))
-                    if node.is_complete():
-                        return True
+        return self.trial_multiple(plan)
+
+class TrialDFS(Trial):
+
+    __metaclass__ = StrategyMeta
+
+    def __init__(self):
+        Trial.__init__(self, "TRIAL-DFS")
+
+    """
+    Finish the board outright by a depth first search with the engine.
+    This is the last resort after all other strategies, including the
+    bounded guesses of TRIAL-1, TRIAL-2, and TRIAL-3, have failed.
+    """
+    def run(self, plan):
+        engine = Backtrack(plan.get_sudoku())
+        solution = engine.solve()
+        if not solution:
+            return False
+        return self.trial_apply(plan, solution, {"steps": engine.steps})
+
+class TrialCDCL(Trial):
+
+    __metaclass__ = StrategyMeta
+
+    def __init__(self):
+        Trial.__init__(self, "TRIAL-CDCL")
+
+    """
+    Similar to TrialDFS except the search is done by the conflict
+    driven clause learning engine, see Cdcl, which learns a nogood from
+    each contradiction rather than stumbling on it over and over again.
+    The nogoods learned are logged for debugging.
+    """
+    def run(self, plan):
+        engine = Cdcl(plan.get_sudoku())
+        solution = engine.solve()
+        for nogood in engine.nogoods():
+            self.debug(2, "nogood {0}".format(nogood))
+        if not solution:
+            return False
+        reason = {"conflicts": engine.conflicts, "nogoods": len(engine.learned)}
+        return self.trial_apply(plan, solution, reason)
+
+    """
+    Disabled by default in favor of TRIAL-DFS, which does much less
+    bookkeeping for the boards that survive the other strategies.
+    """
+    def default(self):
         return False
@@ -2,7 +2,6 @@
 # Unique Rectangle strategy module
 #
 
-import itertools
 from logger import *
 from playbook import *
 from sudoku import *
@@ -26,6 +25,12 @@ class UniqueRectangle(Strategy):
 
     Beyond these traints, there are many variations of UNIQUE RECTANGLE.
     For details of how this strategy works, please refer to sudokuwiki.
+
+    Given the second requirement, the search is driven by the bi-value
+    nodes rather than all 2x2 lattices. The other corners are looked up
+    from the bitboard of nodes with both hints of the pair, which serves
+    just as well for the variations without a bi-value node should they
+    be added.
     """
     def __init__(self):
         Strategy.__init__(self, "UNIQUE-RECTANGLE")
@@ -54,16 +59,18 @@ class UniqueRectangle(Strategy):
             return self.purge_hints(plan, overlap, diff, reason, "type 2")
 
         # Unique Type 3.        
-        diff = rl.get_hints() | rr.get_hints() - hints
+        diff = (rl.get_hints() | rr.get_hints()) - hints
         if len(diff) == 2:
             for node in overlap:
                 if node.get_hints() == diff:
-                    return self.purge_hints(plan, overlap, diff, reason, "type 3")
+                    others = (overlap & node.find_related()) - set([node])
+                    if self.purge_hints(plan, others, diff, reason, "type 3"):
+                        return True
 
         # Unique Type 4.
         excl = hints & self.exclusive_hints(roof)
         if excl:
-            return self.unique_rectangle_purge(plan, roof, hints - excl, reason, "type 4")
+            return self.purge_hints(plan, roof, hints - excl, reason, "type 4")
 
         # Hidden Type 2.
         for x, y in ((fl, rl), (fr, rr)):
@@ -102,8 +109,8 @@ class UniqueRectangle(Strategy):
         # c --- d
         a, b, c, d = nodes
 
-        # Either pair of the edges must fit into a single box.
-        if a.get_box() != b.get_box() and a.get_box != c.get_box():
+        # Exactly one pair of the edges must fit into a single box.
+        if (a.get_box() == b.get_box()) == (a.get_box() == c.get_box()):
             return False
 
         # Every node must have the conjugate pair among other hints.
@@ -132,16 +139,42 @@ class UniqueRectangle(Strategy):
         return False
 
     """
-    Look for and process UNIQUE RECTANGLE in the space of all
-    2x2 lattices.
+    Return the 2x2 lattices that may form UNIQUE RECTANGLE as 2-tuples
+    of rows and cols. Starting from each bi-value node, the corners in
+    the same row and col are the nodes with the same pair of hints, and
+    the fourth corner must have the pair as well. The lattice must span
+    exactly two boxes.
+    """
+    def unique_rectangle_find(self, sudoku):
+        lattices = set()
+        for pair, bmask in sudoku.get_bivalue().items():
+            mask = (1 << 81) - 1
+            for hint in pair:
+                mask &= sudoku.get_hint_mask(hint)
+            for node in sudoku.mask_nodes(bmask):
+                i, j = divmod(node.get_index(), 9)
+                rmask = node.get_row().get_mask() & mask & ~node.get_mask()
+                cmask = node.get_col().get_mask() & mask & ~node.get_mask()
+                for col in [x % 9 for x in Bitmask.indices(rmask)]:
+                    for row in [x / 9 for x in Bitmask.indices(cmask)]:
+                        if not mask >> (row * 9 + col) & 1:
+                            continue
+                        if (i / 3 == row / 3) == (j / 3 == col / 3):
+                            continue
+                        lattices.add(((min(i, row), max(i, row)), (min(j, col), max(j, col))))
+        return lattices
+
+    """
+    Look for and process UNIQUE RECTANGLE in the 2x2 lattices found
+    from the bi-value nodes.
     """
     def run(self, plan):
         status = False
-        for rows in itertools.combinations(range(9), 2):
-            for cols in itertools.combinations(range(9), 2):
-                nodes = [plan.get_sudoku().get_node(i, j) for i in rows for j in cols]
-                if any([x.is_complete() for x in nodes]):
-                    continue
-                if self.unique_rectangle(plan, nodes):
-                    status = True
+        sudoku = plan.get_sudoku()
+        for rows, cols in sorted(self.unique_rectangle_find(sudoku)):
+            nodes = [sudoku.get_node(i, j) for i in rows for j in cols]
+            if any([x.is_complete() for x in nodes]):
+                continue
+            if self.unique_rectangle(plan, nodes):
+                status = True
         return status
@@ -0,0 +1,62 @@
+#
+# Wing base module
+#
+
+from logger import *
+from playbook import *
+from sudoku import *
+
+class Wing(Strategy):
+
+    """
+    This class provides the base support for wing based strategies,
+    such as Y-WING and XYZ-WING. A wing consists of a pivot node and
+    two bi-value pincer nodes that the pivot can see. Each pincer
+    shares exactly one hint with the pivot and the two pincers share
+    the hint Z to be eliminated.
+
+    Rather than trying all combinations of nodes, the search is driven
+    by the pivot. The bi-value nodes are indexed by their pair of hints
+    as bitboards, so that the pincers for a pivot are found by masking
+    the peers of the pivot with the bitboard of the pair wanted.
+    """
+    def __init__(self, name):
+        Strategy.__init__(self, name)
+
+    """
+    Return the index of bi-value nodes, which maps each pair of hints
+    to the bitboard of the bi-value nodes with that pair. The index is
+    shared with the other strategies through the Sudoku instance.
+    """
+    def wing_index(self, sudoku):
+        return sudoku.get_bivalue()
+
+    """
+    Return the bitboard of all bi-value nodes in the index.
+    """
+    def wing_all_nodes(self, index):
+        mask = 0
+        for x in index.values():
+            mask |= x
+        return mask
+
+    """
+    Return the bi-value nodes visible to the pivot with the given pair
+    of hints. Nodes updated since the index was built are skipped.
+    """
+    def wing_pincers(self, sudoku, index, pivot, pair):
+        mask = pivot.get_peer_mask() & index.get(frozenset(pair), 0)
+        return [x for x in sudoku.mask_nodes(mask)
+                if not x.is_complete() and x.get_hints() == pair]
+
+    """
+    Return the nodes visible to all of the given nodes except the nodes
+    themselves, i.e., the bitboard equivalent of join_related().
+    """
+    def wing_overlap(self, sudoku, nodes):
+        mask = nodes[0].get_peer_mask()
+        for node in nodes[1:]:
+            mask &= node.get_peer_mask()
+        for node in nodes:
+            mask &= ~node.get_mask()
+        return sudoku.mask_nodes(mask)
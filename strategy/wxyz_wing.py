@@ -26,6 +26,12 @@ class WXYZWing(AlmostLockedSet):
     up of a 1-node and a 3-node ALS, respectively. The two ALS's share
     a restricted common hint, W, and a unrestricted common hint, Z. As
     such, the total number of hints remains 4 across the two ALS's.
+
+    The 1-node ALS's are the bi-value nodes, whose pair of hints must
+    be among those of the 3-node ALS. The 3-node ALS's are bucketed by
+    each pair of their hints, so that only those with the pair of the
+    bi-value node are visited, and only if the bi-value node can see
+    all instances of either hint in them.
     """
     def __init__(self):
         AlmostLockedSet.__init__(self, "WXYZ-WING")
@@ -51,19 +57,40 @@ class WXYZWing(AlmostLockedSet):
 
         return False
 
+    """
+    Return the 3-node ALS's in the catalog bucketed by each pair of
+    their hints. ALS's are given by their positions in the catalog.
+    """
+    def wxyz_wing_buckets(self, catalog):
+        buckets = dict()
+        for k in range(len(catalog.alsets)):
+            if len(catalog.alsets[k]) == 3:
+                for pair in itertools.combinations(sorted(catalog.hints[k]), 2):
+                    buckets.setdefault(frozenset(pair), []).append(k)
+        return buckets
+
     """
     WXYZ-WING strategy.
     """
     def run(self, plan):
         status = False
-        alsets1 = self.als_find_in_nodes(plan.get_sudoku().get_incomplete(), [1])
-        alsets3 = self.als_find_in_lots(plan.get_sudoku().get_lots(), [3])
-        for als1 in alsets1:
-            if any([x.is_complete() for x in als1]):
-                continue
-            for als3 in alsets3:
-                if any([x.is_complete() for x in als3]):
+        sudoku = plan.get_sudoku()
+        catalog = self.als_catalog(sudoku)
+        buckets = self.wxyz_wing_buckets(catalog)
+        for pair, mask in sudoku.get_bivalue().items():
+            for node in sudoku.mask_nodes(mask):
+                if node.is_complete():
                     continue
-                if self.wxyz_wing(plan, als1, als3):
-                    status = True
+                peers = node.get_peer_mask()
+                for k in buckets.get(pair, []):
+                    if catalog.nodes[k] & node.get_mask():
+                        continue
+                    # The bi-value node must see either hint in full.
+                    if all([catalog.masks[k][x] & ~peers for x in pair]):
+                        continue
+                    als3 = catalog.alsets[k]
+                    if any([x.is_complete() for x in als3]):
+                        continue
+                    if self.wxyz_wing(plan, frozenset([node]), als3):
+                        status = True
         return status
@@ -2,12 +2,12 @@
 # XY-Chain strategy module
 #
 
-import itertools
 from logger import *
 from playbook import *
 from sudoku import *
+from wing import *
 
-class XYChain(Strategy):
+class XYChain(Wing):
 
     __metaclass__ = StrategyMeta
 
@@ -20,70 +20,104 @@ class XYChain(Strategy):
     visibility. As such, Z has to be on in either end of the chain.
     """
     def __init__(self):
-        Strategy.__init__(self, "XY-CHAIN")
+        Wing.__init__(self, "XY-CHAIN")
 
     """
-    Recursively walk the chain. Return True if the tail node is reached or
-    False when all qualifying links have been exhausted.
+    Return the bi-value graph as a map from each bi-value node to its
+    pair of hints together with the bitboards of bi-value nodes for
+    each hint. The links from a node by a hint are the bi-value nodes
+    in its peers that have the same hint.
     """
-    def xy_chain_walk(self, chain, tail, hint, z):
-        link = chain[-1]
-        for node in link.find_related():
-            if node.is_complete() or node in chain:
-                continue
-            # The next link must be a bi-value link with the hint we are
-            # looking for.
-            if len(node.get_hints()) > 2 or not hint < node.get_hints():
-                continue
-            # We must connect with the tail via Y instead of Z
-            if node == tail and hint != z:
-                return chain + [node]
-            res = self.xy_chain_walk(chain + [node], tail, node.get_hints() - hint, z)
-            if res:
-                return res
-        return None
+    def xy_chain_graph(self, sudoku):
+        pairs = dict()
+        masks = dict((i, 0) for i in range(1, 10))
+        for pair, mask in self.wing_index(sudoku).items():
+            for node in sudoku.mask_nodes(mask):
+                pairs[node] = pair
+            for i in pair:
+                masks[i] |= mask
+        return pairs, masks
 
     """
-    Search for XY-CHAIN between the pair of nodes and process it
-    if found.
+    Return the other hint in the pair.
     """
-    def xy_chain(self, plan, pair):
-        status = False
+    def xy_chain_other(self, pair, hint):
+        return [x for x in pair if x != hint][0]
 
-        xz, yz = pair[0], pair[1]
-        for candidate in xz.get_hints() & yz.get_hints():
-            if xz.is_complete() or yz.is_complete():
-                break
+    """
+    Walk the bi-value graph breadth first from the head assuming the
+    head is not z, which turns the other hint of the head on. Each
+    location reached is a 2-tuple of node and the hint turned on by
+    the chain. Return the locations in the order discovered together
+    with the back link of each to the location it was reached from,
+    so that every location comes with one of its shortest chains.
+    """
+    def xy_chain_walk(self, sudoku, graph, head, z):
+        pairs, masks = graph
+        origin = (head, self.xy_chain_other(pairs[head], z))
+        back = {origin: None}
+        locs = [origin]
+        for node, hint in locs:
+            # The next link must be a bi-value node with the hint we
+            # just turned on, which is then turned off in that node.
+            for next in sudoku.mask_nodes(node.get_peer_mask() & masks[hint]):
+                loc = (next, self.xy_chain_other(pairs[next], hint))
+                if not loc in back:
+                    back[loc] = (node, hint)
+                    locs.append(loc)
+        return locs, back
 
-            z = set([candidate])
-            x = xz.get_hints() - z
+    """
+    Return the chain of nodes leading from the head to the given
+    location by following the back links.
+    """
+    def xy_chain_path(self, back, loc):
+        chain = []
+        while loc:
+            chain.insert(0, loc[0])
+            loc = back[loc]
+        return chain
 
-            chain = self.xy_chain_walk([xz], yz, x, z)
-            if not chain:
-                continue
+    """
+    Search for XY-CHAIN from the given head with z at either end and
+    process all of them found.
+    """
+    def xy_chain(self, plan, graph, xz, z):
+        status = False
+        sudoku = plan.get_sudoku()
 
-            overlap = xz.find_related() & yz.find_related()
-            overlap -= set(pair)
+        locs, back = self.xy_chain_walk(sudoku, graph, xz, z)
+        for loc in locs:
+            yz, hint = loc
+            # We must connect with the tail via Y instead of Z, which
+            # turns Z on in the tail.
+            if yz == xz or hint != z:
+                continue
+            # In case nodes at either end have been updated...
+            if xz.is_complete() or yz.is_complete():
+                continue
 
-            if self.test_purge(overlap, z):
-                reason = {"hint": z, "xz": chain[0], "yz": chain[-1], "chain": chain[1:]}
-                self.purge_hints(plan, overlap, z, reason)
+            overlap = self.wing_overlap(sudoku, [xz, yz])
+            hints = set([z])
+            if self.test_purge(overlap, hints):
+                chain = self.xy_chain_path(back, loc)
+                reason = {"hint": hints, "xz": chain[0], "yz": chain[-1], "chain": chain[1:]}
+                self.purge_hints(plan, overlap, hints, reason)
                 status = True
 
         return status
 
     """
     Look for and process XY-CHAIN across all nodes with the required
-    hints.
+    hints. The bi-value graph is built once and walked once from each
+    node and hint.
     """
     def run(self, plan):
         status = False
-        nodes = [node for node in plan.get_sudoku().get_incomplete()
-                 if len(node.get_hints()) == 2]
-        for pair in itertools.combinations(nodes, 2):
-            # In case nodes in the candidate group have been updated...
-            if any([x.is_complete() for x in pair]):
-                continue
-            if self.xy_chain(plan, pair):
-                status = True
+        graph = self.xy_chain_graph(plan.get_sudoku())
+        pairs, masks = graph
+        for node, pair in pairs.items():
+            for z in pair:
+                if self.xy_chain(plan, graph, node, z):
+                    status = True
         return status
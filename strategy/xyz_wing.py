@@ -2,12 +2,12 @@
 # XYZ-Wing strategy module
 #
 
-import itertools
 from logger import *
 from playbook import *
 from sudoku import *
+from wing import *
 
-class XYZWing(Strategy):
+class XYZWing(Wing):
 
     __metaclass__ = StrategyMeta
 
@@ -24,26 +24,25 @@ class XYZWing(Strategy):
     XZ, YZ, and XYZ.
     """
     def __init__(self):
-        Strategy.__init__(self, "XYZ-WING")
+        Wing.__init__(self, "XYZ-WING")
 
     """
     Validate the XYZ-WING pattern and process it if found.
     """
-    def xyz_wing(self, plan, xyz, pair):
-        xz, yz = pair
+    def xyz_wing(self, plan, xyz, xz, yz):
+        # In case nodes in the candidate group have been updated...
+        if any([node.is_complete() for node in (xyz, xz, yz)]):
+            return False
 
-        # 1) XZ | YZ == XYZ
+        # XZ | YZ == XYZ
         if xz.get_hints() | yz.get_hints() != xyz.get_hints():
             return False
-        # 2) XYZ <-> XZ, XYZ <-> YZ, but not XZ <-> YZ
-        if not xyz.is_related(xz) or not xyz.is_related(yz) or xz.is_related(yz):
+        # XYZ <-> XZ, XYZ <-> YZ, but not XZ <-> YZ
+        if xz.is_related(yz):
             return False
 
         z = xz.get_hints() & yz.get_hints()
-
-        overlap = xyz.find_related() & xz.find_related() & yz.find_related()
-        overlap -= set([xyz])
-        overlap -= set(pair)
+        overlap = self.wing_overlap(plan.get_sudoku(), [xyz, xz, yz])
 
         if self.test_purge(overlap, z):
             reason = {"hint": z, "xyz": xyz, "xz": xz, "yz": yz}
@@ -53,27 +52,27 @@ class XYZWing(Strategy):
         return False
 
     """
-    Look for and process Y-WING patterns across all nodes with the required
-    hints.    
+    Look for and process XYZ-WING patterns with each tri-value node as
+    the pivot XYZ. The pincers XZ and YZ are looked up among the bi-value
+    nodes the pivot can see by their pair of hints.
     """
     def run(self, plan):
         status = False
 
         sudoku = plan.get_sudoku()
+        index = self.wing_index(sudoku)
         for xyz in [node for node in sudoku.get_incomplete()
-                      if len(node.get_hints()) == 3]:
-            # In case the hinge node has been updated...
+                    if len(node.get_hints()) == 3]:
+            # In case the pivot has been updated...
             if xyz.is_complete() or len(xyz.get_hints()) != 3:
                 continue
 
-            nodes = [node for node in sudoku.get_incomplete()
-                     if len(node.get_hints()) == 2 and node != xyz]
-            for pair in itertools.combinations(nodes, 2):
-                # In case nodes in the candidate group have been updated...
-                if any([x.is_complete() for x in pair]):
-                    continue
-
-                if self.xyz_wing(plan, xyz, pair):
-                    status = True
+            hints = xyz.get_hints()
+            for z in hints:
+                x, y = hints - set([z])
+                for xz in self.wing_pincers(sudoku, index, xyz, set([x, z])):
+                    for yz in self.wing_pincers(sudoku, index, xyz, set([y, z])):
+                        if self.xyz_wing(plan, xyz, xz, yz):
+                            status = True
 
         return status
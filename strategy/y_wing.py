@@ -2,12 +2,12 @@
 # Y-Wing strategy module
 #
 
-import itertools
 from logger import *
 from playbook import *
 from sudoku import *
+from wing import *
 
-class YWing(Strategy):
+class YWing(Wing):
 
     __metaclass__ = StrategyMeta
 
@@ -24,53 +24,50 @@ class YWing(Strategy):
     XZ and YZ.
     """
     def __init__(self):
-        Strategy.__init__(self, "Y-WING")
+        Wing.__init__(self, "Y-WING")
 
     """
     Validate the Y-WING pattern and process it if found.
     """
-    def y_wing(self, plan, candidate):
-        for i in range(3):
-            # Y-WING requires 3 nodes, XY, XZ, YZ with the following properties.
-            xy = candidate[i]
-            xz = candidate[(i + 1) % 3]
-            yz = candidate[(i + 2) % 3]
-
-            # 1) XY ^ XZ == YZ
-            if xy.get_hints() ^ xz.get_hints() != yz.get_hints():
-                continue
-            # 2) XY <-> XZ, XY <-> YZ, but not XZ <-> YZ
-            if not xy.is_related(xz) or not xy.is_related(yz) or xz.is_related(yz):
-                continue
+    def y_wing(self, plan, xy, xz, yz):
+        # In case nodes in the candidate group have been updated...
+        if any([node.is_complete() for node in (xy, xz, yz)]):
+            return False
 
-            z = xz.get_hints() & yz.get_hints()
+        # XY <-> XZ, XY <-> YZ, but not XZ <-> YZ
+        if xz.is_related(yz):
+            return False
 
-            overlap = xz.find_related() & yz.find_related()
-            overlap -= set(candidate)
+        z = xz.get_hints() & yz.get_hints()
+        overlap = self.wing_overlap(plan.get_sudoku(), [xz, yz])
 
-            if self.test_purge(overlap, z):
-                reason = {"hint": z, "xy": xy, "xz": xz, "yz": yz}
-                self.purge_hints(plan, overlap, z, reason)
-                return True
+        if self.test_purge(overlap, z):
+            reason = {"hint": z, "xy": xy, "xz": xz, "yz": yz}
+            self.purge_hints(plan, overlap, z, reason)
+            return True
 
         return False
 
     """
-    Look for and process Y-WING patterns across all nodes with the required
-    hints.
+    Look for and process Y-WING patterns with each bi-value node as the
+    pivot XY. The pincers XZ and YZ are looked up among the bi-value
+    nodes the pivot can see by their pair of hints.
     """
     def run(self, plan):
         status = False
 
-        # Limit the Y-WING check to nodes with 2 hints only.
-        nodes = [node for node in plan.get_sudoku().get_incomplete()
-                 if len(node.get_hints()) == 2]
-        for candidate in itertools.combinations(nodes, 3):
-            # In case nodes in the candidate group have been updated...
-            if any([node.is_complete() for node in candidate]):
+        sudoku = plan.get_sudoku()
+        index = self.wing_index(sudoku)
+        for xy in sudoku.mask_nodes(self.wing_all_nodes(index)):
+            # In case the pivot has been updated...
+            if xy.is_complete() or len(xy.get_hints()) != 2:
                 continue
 
-            if self.y_wing(plan, candidate):
-                status = True
+            x, y = xy.get_hints()
+            for z in set(range(1, 10)) - xy.get_hints():
+                for xz in self.wing_pincers(sudoku, index, xy, set([x, z])):
+                    for yz in self.wing_pincers(sudoku, index, xy, set([y, z])):
+                        if self.y_wing(plan, xy, xz, yz):
+                            status = True
 
         return status
@@ -25,6 +25,30 @@ class LogicException(Exception):
     def __str__(self):
         return repr(self.entity)
 
+class Bitmask(object):
+
+    """
+    Helpers for bitboards. A bitboard is an integer with one bit per
+    node on the board, where bit (i * 9 + j) stands for the node at
+    row i and col j. Set algebra over nodes then turns into integer
+    operations, which is much cheaper than building sets of nodes.
+    """
+
+    @staticmethod
+    def count(mask):
+        return bin(mask).count("1")
+
+    @staticmethod
+    def first(mask):
+        return (mask & -mask).bit_length() - 1
+
+    @staticmethod
+    def indices(mask):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
 class Node(object):
 
     def __init__(self, value):
@@ -41,6 +65,8 @@ class Node(object):
         self.box = None
 
         self.hints = None
+        self.peers = None
+        self.serial = 0
 
     def check_value(self, value, zero = False):
         if value < 0 or value > 9:
@@ -69,6 +95,26 @@ class Node(object):
     def get_lots(self):
         return (self.row, self.col, self.box)
 
+    """
+    Return the position of the node on the board, which is also the
+    bit the node occupies in a bitboard.
+    """
+    def get_index(self):
+        return self.row.get_ident() * 9 + self.col.get_ident()
+
+    def get_mask(self):
+        return 1 << self.get_index()
+
+    """
+    Return the bitboard of all nodes related to this one, i.e., the
+    bitboard equivalent of find_related() without the node itself.
+    """
+    def get_peer_mask(self):
+        if self.peers is None:
+            self.peers = self.row.get_mask() | self.col.get_mask() | self.box.get_mask()
+            self.peers &= ~self.get_mask()
+        return self.peers
+
     def at(self, i, j):
         return self.row.get_ident() == i and self.col.get_ident() == j
 
@@ -88,6 +134,7 @@ class Node(object):
         self.check_value(value)
         self.value = value
         self.reset_hints()
+        self.serial += 1
 
     def has_hints(self):
         return not self.hints is None
@@ -107,11 +154,19 @@ class Node(object):
                 return False
 
         self.hints = copy
+        self.serial += 1
         return True
 
     def reset_hints(self):
         self.hints = None
 
+    """
+    Return the serial number of the node, which is bumped whenever its
+    value or hints change.
+    """
+    def get_serial(self):
+        return self.serial
+
     """
     Return the set of all nodes related to this one.
     """
@@ -177,6 +232,7 @@ class Lot(object):
         self.sudoku = sudoku
         self.ident = ident
         self.nodes = None
+        self.mask = None
 
     def get_sudoku(self):
         return self.sudoku
@@ -190,6 +246,16 @@ class Lot(object):
     def get_node(self, i):
         return self.nodes[i]
 
+    """
+    Return the bitboard of all nodes in the lot.
+    """
+    def get_mask(self):
+        if self.mask is None:
+            self.mask = 0
+            for node in self.nodes:
+                self.mask |= node.get_mask()
+        return self.mask
+
     def count_incomplete(self):
         return len(self.get_incomplete())
 
@@ -354,6 +420,10 @@ class Sudoku(object):
 
         self.lots = self.rows + self.cols + self.boxes
 
+        # Structures derived from the nodes, see get_derived().
+        self.derived = dict()
+        self.derived_version = None
+
     """
     Taks a snapshot of the Sudoku instance and return it.
     """
@@ -420,6 +490,90 @@ class Sudoku(object):
     def get_node(self, i, j):
         return self.nodes[i][j]
 
+    """
+    Return the node at the given position, see Node.get_index().
+    """
+    def get_node_at(self, index):
+        return self.nodes[index / 9][index % 9]
+
+    """
+    Return the list of nodes in the given bitboard.
+    """
+    def mask_nodes(self, mask):
+        return [self.get_node_at(x) for x in Bitmask.indices(mask)]
+
+    """
+    Return the bitboard of incomplete nodes that have the given hint.
+    """
+    def get_hint_mask(self, hint):
+        mask = 0
+        for node in self.get_incomplete():
+            if node.has_hint(hint):
+                mask |= node.get_mask()
+        return mask
+
+    """
+    Return the version of the Sudoku instance, which moves forward
+    whenever any of its nodes is updated.
+    """
+    def get_version(self):
+        return sum([node.get_serial() for row in self.nodes for node in row])
+
+    """
+    Return the structure derived from the Sudoku instance under the given
+    name. The structure is built by calling build with the instance on
+    first use and shared by all callers until the version of the instance
+    moves on, after which all derived structures are dropped and rebuilt
+    on demand.
+    """
+    def get_derived(self, name, build):
+        version = self.get_version()
+        if self.derived_version != version:
+            self.derived = dict()
+            self.derived_version = version
+        if not name in self.derived:
+            self.derived[name] = build(self)
+        return self.derived[name]
+
+    """
+    Return the index of bi-value nodes, which maps each pair of hints
+    to the bitboard of the bi-value nodes with that pair.
+    """
+    def get_bivalue(self):
+        return self.get_derived("bivalue", Sudoku.build_bivalue)
+
+    """
+    Return the conjugate pairs of the given hint as a list of 2-tuples
+    of lot and bitboard of the only two nodes with the hint in the lot.
+    """
+    def get_conjugates(self, hint):
+        return self.get_derived("conjugates", Sudoku.build_conjugates)[hint]
+
+    """
+    Build the index for get_bivalue().
+    """
+    @staticmethod
+    def build_bivalue(sudoku):
+        index = dict()
+        for node in sudoku.get_incomplete():
+            hints = node.get_hints()
+            if len(hints) == 2:
+                pair = frozenset(hints)
+                index[pair] = index.get(pair, 0) | node.get_mask()
+        return index
+
+    """
+    Build the conjugate pairs of all hints for get_conjugates().
+    """
+    @staticmethod
+    def build_conjugates(sudoku):
+        conjugates = dict()
+        for hint in range(1, 10):
+            mask = sudoku.get_hint_mask(hint)
+            conjugates[hint] = [(lot, lot.get_mask() & mask) for lot in sudoku.get_lots()
+                                if Bitmask.count(lot.get_mask() & mask) == 2]
+        return conjugates
+
     def get_row(self, i):
         return self.rows[i]
 
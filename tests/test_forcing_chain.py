@@ -0,0 +1,81 @@
+#
+# Forcing Chain strategy test module
+#
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from logger import *
+from sudoku import *
+from playbook import *
+from strategy import *
+
+Logger.debug_level = -1
+
+class ForcingChainWebTest(unittest.TestCase):
+
+    """
+    Grid 01 of sample/hard_sudoku.txt with the hints left by the lower
+    level strategies.
+    """
+    STATE = (
+        "8[1,2,4,6][2,4,5,6,9][2,3,4,7][1,2,3,5,7][1,2,3,4][1,3,5,6,9][4,5,7,9]"
+        "[1,3,4,5,6,7,9][1,2,4,5,9][1,2,4]36[1,2,5,7,8][1,2,4,8][1,5,8,9][4,5,7,8,9]"
+        "[1,4,5,7,9][1,4,5,6]7[4,5,6][3,4,8]9[1,3,4,8]2[4,5,8][1,3,4,5,6][1,2,3,4,6,9]"
+        "5[2,4,6,9][2,3,8,9][2,3,6,8]7[1,6,8,9][2,4,8,9][1,2,4,6,9][1,2,3,6,9]"
+        "[1,2,3,6,8][2,6,9][2,3,8,9]457[2,8,9][1,2,6,9][2,4,6,7,9][2,4,6,8][2,4,6,7,9]"
+        "1[2,6,8][2,6,8,9][5,6,8,9]3[2,4,5,6,9][2,3,4,5,7][2,3,4]1[2,3,4,7,9][2,3,7]"
+        "[2,3,4,9][3,5,9]68[2,3,4,6,7][2,3,4,6]85[2,3,6,7][2,3,4,6,9][3,9]1[2,3,7,9]"
+        "[2,3,5,6,7]9[2,5,6,7][2,3,7,8][1,2,3,6,7,8][1,2,3,6,8]4[2,5,7][2,3,5,7]")
+
+    """
+    Cache the web from the given origin, remove the given hint, and
+    return the cached web, the web looked up again, and a web walked
+    from scratch.
+    """
+    def webs(self, index, hint):
+        sudoku = Sudoku.load(self.STATE, "test")
+        plan = Plan(sudoku, Options())
+        strategy = Playbook.catalog["CELL FORCING-CHAIN"]
+        groups = strategy.chain_group_table(sudoku)
+        node = sudoku.get_incomplete()[0]
+        origin = (((node, ), min(node.get_hints())), True)
+        cached = strategy.forcing_chain_web(plan, origin, groups,
+                                            strategy.forcing_chain_alive(sudoku))
+
+        links = set([x for x, color in cached.keys()])
+        other = sudoku.get_node_at(index)
+        if other.is_complete() or not other.has_hint(hint) or ((other, ), hint) in links:
+            return None
+        other.set_hints(other.get_hints() - set([hint]))
+
+        groups = strategy.chain_group_table(sudoku)
+        found = strategy.forcing_chain_web(plan, origin, groups,
+                                           strategy.forcing_chain_alive(sudoku))
+        fresh = dict()
+        strategy.forcing_chain_walk(origin, fresh, groups)
+        return (cached, found, fresh)
+
+    """
+    Removing a hint outside the links of a cached web may add new links
+    to it, in which case the web must be walked again.
+    """
+    def test_web_rebuilt(self):
+        changed = 0
+        for index in range(81):
+            for hint in range(1, 10):
+                webs = self.webs(index, hint)
+                if webs is None:
+                    continue
+                cached, found, fresh = webs
+                self.assertEqual(set(found.keys()), set(fresh.keys()))
+                if set(cached.keys()) != set(fresh.keys()):
+                    self.assertFalse(found is cached)
+                    changed += 1
+        self.assertTrue(changed > 0)
+
+if __name__ == "__main__":
+    unittest.main()